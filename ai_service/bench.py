@@ -0,0 +1,384 @@
+"""
+Benchmarks for the AI engine.
+
+    python bench.py modes [--model amazon/chronos-t5-tiny] [--modes fp32,bf16,int8,compile]
+                          [--series 64] [--batch-size 16] [--repeats 5] [--tolerance 0.05]
+                          [--out modes_report.json]
+
+    python bench.py backtest DATA_DIR [--engines stat/ses,stat/tsb,amazon/chronos-t5-tiny]
+                             [--batch-sizes 1,8,32] [--horizon 7] [--min-train 14] [--step 7]
+                             [--out backtest_report.json]
+
+    python bench.py zones [--zones 100000] [--queries 2000] [--radius-km 10] [--out zones_report.json]
+
+`modes` runs a fixed, seeded dataset through each Chronos inference mode and reports
+latency, throughput and forecast deviation vs fp32, recommending the fastest mode
+whose deviation stays within --tolerance. No report is checked in: the numbers depend on
+the host CPU and need torch plus the Chronos weights, so generate one on the serving
+hardware before picking CHRONOS_INFERENCE_MODE.
+
+`backtest` replays every daily sales series in DATA_DIR (one .csv or .json file per
+series) through rolling-origin backtests and reports, per engine, accuracy (MAPE,
+sMAPE, pinball loss) and per batch size throughput and p50/p99 latency. Output keys
+are stable so reports can be diffed between releases.
+
+`zones` builds the micro-zone spatial index over synthetic zones spread across Indian
+cities and reports per-query cost of heatmap radius and nearest-zone lookups against
+the linear scan it replaces.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import stat_engine
+from geo_index import GridIndex
+from inference import percentile
+from model_loader import CHRONOS_MODELS, INFERENCE_MODES, load_pipeline, predict_batch
+
+HISTORY_WINDOW = 30
+FORECAST_HORIZON = 7
+
+
+def synthetic_series(count: int, length: int = HISTORY_WINDOW, seed: int = 7):
+    """Fixed daily-sales dataset: level + weekly seasonality + noise, same for every run."""
+    rng = np.random.RandomState(seed)
+    days = np.arange(length)
+    level = rng.uniform(20, 120, size=(count, 1))
+    weekly = rng.uniform(0.05, 0.3, size=(count, 1)) * level * np.sin(2 * np.pi * days / 7)
+    noise = rng.normal(0, 0.08, size=(count, length)) * level
+    return np.maximum(0.0, level + weekly + noise).round(2)
+
+
+def _timed_predict(pipeline, data, batch_size: int, seed: int):
+    """Predicts the whole dataset in batches; returns (medians [N, H], per-batch latencies in ms)."""
+    import torch
+
+    torch.manual_seed(seed)
+    medians, latencies = [], []
+    for start in range(0, len(data), batch_size):
+        chunk = data[start:start + batch_size].tolist()
+        t0 = time.perf_counter()
+        samples = predict_batch(pipeline, chunk, FORECAST_HORIZON)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        medians.extend(np.median(s, axis=0) for s in samples)
+    return np.array(medians), latencies
+
+
+def bench_modes(args):
+    data = synthetic_series(args.series)
+    # fp32 always runs first: it is the accuracy reference
+    modes = ["fp32"] + [m.strip() for m in args.modes.split(",") if m.strip() and m.strip() != "fp32"]
+
+    results = {}
+    reference = None
+    for mode in modes:
+        print(f"[{mode}] loading {args.model}...", file=sys.stderr)
+        t0 = time.perf_counter()
+        pipeline = load_pipeline(args.model, mode)
+        load_s = time.perf_counter() - t0
+
+        # Warm-up (also triggers torch.compile) is excluded from timings
+        _timed_predict(pipeline, data[:args.batch_size], args.batch_size, args.seed)
+
+        latencies = []
+        total_s = 0.0
+        medians = None
+        for _ in range(args.repeats):
+            t0 = time.perf_counter()
+            medians, batch_latencies = _timed_predict(pipeline, data, args.batch_size, args.seed)
+            total_s += time.perf_counter() - t0
+            latencies.extend(batch_latencies)
+
+        if mode == "fp32":
+            reference = medians
+        denom = np.maximum(np.abs(reference), 1e-6)
+        rel_dev = np.abs(medians - reference) / denom
+
+        results[mode] = {
+            "load_s": round(load_s, 2),
+            "batch_latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p99": round(percentile(latencies, 99), 2),
+            },
+            "throughput_series_per_s": round(args.series * args.repeats / total_s, 1),
+            "deviation_vs_fp32": {
+                "mean_rel": round(float(rel_dev.mean()), 4),
+                "max_rel": round(float(rel_dev.max()), 4),
+            },
+            "within_tolerance": bool(rel_dev.mean() <= args.tolerance),
+        }
+        del pipeline
+
+    eligible = [m for m, r in results.items() if r["within_tolerance"]]
+    recommended = max(eligible, key=lambda m: results[m]["throughput_series_per_s"]) if eligible else "fp32"
+    return {
+        "benchmark": "inference_modes",
+        "model": args.model,
+        "dataset": {"series": args.series, "history": HISTORY_WINDOW, "horizon": FORECAST_HORIZON, "seed": args.seed},
+        "batch_size": args.batch_size,
+        "repeats": args.repeats,
+        "tolerance": args.tolerance,
+        "modes": results,
+        "recommended_mode": recommended,
+    }
+
+
+def load_series_dir(path: str) -> dict:
+    """
+    Reads one daily sales series per file, oldest first:
+      .json: a list of numbers or {"sales": [...]}
+      .csv:  the 'sales' column if present, else the last column (header row optional)
+    """
+    series = {}
+    for fname in sorted(os.listdir(path)):
+        full = os.path.join(path, fname)
+        name, ext = os.path.splitext(fname)
+        if ext == ".json":
+            with open(full) as f:
+                data = json.load(f)
+            values = data.get("sales", []) if isinstance(data, dict) else data
+        elif ext == ".csv":
+            with open(full, newline="") as f:
+                rows = [row for row in csv.reader(f) if row]
+            col = -1
+            if rows and rows[0] and not _is_number(rows[0][col]):
+                header = [h.strip().lower() for h in rows.pop(0)]
+                col = header.index("sales") if "sales" in header else -1
+            values = [row[col] for row in rows]
+        else:
+            continue
+        series[name] = [float(v) for v in values]
+    return series
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def rolling_windows(series: dict, horizon: int, min_train: int, step: int):
+    """Rolling-origin splits: (series name, history up to origin (last HISTORY_WINDOW days), next `horizon` actuals)."""
+    windows = []
+    for name, values in series.items():
+        for origin in range(min_train, len(values) - horizon + 1, step):
+            windows.append((name, values[max(0, origin - HISTORY_WINDOW):origin], values[origin:origin + horizon]))
+    return windows
+
+
+def _pad_context(history: list) -> list:
+    """Left-pads to HISTORY_WINDOW with the first value, as the API does before calling Chronos."""
+    return [history[0]] * (HISTORY_WINDOW - len(history)) + list(history)
+
+
+def _engine_predictor(engine: str, mode: str, horizon: int):
+    """Returns predict(contexts) -> list of [samples, horizon] arrays for 'stat/<method>' or a Chronos model name."""
+    if engine.startswith("stat/"):
+        method = engine.split("/", 1)[1]
+        if method not in stat_engine.STAT_METHODS:
+            raise ValueError(f"Unknown statistical method '{method}', expected one of {stat_engine.STAT_METHODS}")
+        return lambda contexts: stat_engine.forecast_many(method, contexts, horizon)
+    pipeline = load_pipeline(engine, mode)
+    return lambda contexts: predict_batch(pipeline, [_pad_context(c) for c in contexts], horizon)
+
+
+def accuracy(samples: list, actuals: list, quantiles: list) -> dict:
+    """MAPE/sMAPE of the median forecast and mean pinball loss over `quantiles`, pooled across windows."""
+    actual = np.asarray(actuals, dtype=np.float64)                       # [W, H]
+    qs = np.stack([np.quantile(s, quantiles, axis=0) for s in samples])  # [W, Q, H]
+    median = np.stack([np.median(s, axis=0) for s in samples])           # [W, H]
+
+    nonzero = actual != 0
+    mape = float(np.mean(np.abs(actual - median)[nonzero] / np.abs(actual[nonzero])) * 100) if nonzero.any() else None
+    denom = np.abs(actual) + np.abs(median)
+    smape_terms = np.where(denom > 0, 200 * np.abs(actual - median) / np.where(denom > 0, denom, 1), 0.0)
+
+    pinball = {}
+    for qi, q in enumerate(quantiles):
+        diff = actual - qs[:, qi, :]
+        pinball[f"{q:g}"] = round(float(np.mean(np.maximum(q * diff, (q - 1) * diff))), 4)
+    return {
+        "mape": round(mape, 3) if mape is not None else None,
+        "smape": round(float(smape_terms.mean()), 3),
+        "pinball": pinball,
+        "mean_pinball": round(float(np.mean(list(pinball.values()))), 4),
+    }
+
+
+def bench_backtest(args):
+    series = load_series_dir(args.data_dir)
+    windows = rolling_windows(series, args.horizon, args.min_train, args.step)
+    if not windows:
+        raise SystemExit(f"No backtest windows: need series longer than {args.min_train + args.horizon} days")
+    contexts = [history for _, history, _ in windows]
+    actuals = [actual for _, _, actual in windows]
+    quantiles = [float(q) for q in args.quantiles.split(",")]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    engines = {}
+    for engine in [e.strip() for e in args.engines.split(",") if e.strip()]:
+        print(f"[{engine}] {len(windows)} windows", file=sys.stderr)
+        predict = _engine_predictor(engine, args.mode, args.horizon)
+        predict(contexts[:max(batch_sizes)])  # warm-up
+
+        runs = {}
+        samples = None
+        for batch_size in batch_sizes:
+            latencies, outputs = [], []
+            t0 = time.perf_counter()
+            for start in range(0, len(contexts), batch_size):
+                b0 = time.perf_counter()
+                outputs.extend(predict(contexts[start:start + batch_size]))
+                latencies.append((time.perf_counter() - b0) * 1000)
+            total_s = time.perf_counter() - t0
+            samples = samples or outputs
+            runs[str(batch_size)] = {
+                "throughput_series_per_s": round(len(contexts) / total_s, 1),
+                "batch_latency_ms": {
+                    "p50": round(percentile(latencies, 50), 3),
+                    "p99": round(percentile(latencies, 99), 3),
+                },
+            }
+        engines[engine] = {"accuracy": accuracy(samples, actuals, quantiles), "batch_sizes": runs}
+
+    return {
+        "benchmark": "backtest",
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine()},
+        "dataset": {
+            "path": os.path.abspath(args.data_dir),
+            "series": len(series),
+            "windows": len(windows),
+            "horizon": args.horizon,
+            "min_train": args.min_train,
+            "step": args.step,
+        },
+        "inference_mode": args.mode,
+        "quantiles": quantiles,
+        "engines": engines,
+    }
+
+
+# (lat, lon) centres used to scatter synthetic zones
+INDIAN_CITIES = {
+    "Mumbai": (19.07, 72.88),
+    "Delhi": (28.61, 77.21),
+    "Bengaluru": (12.97, 77.59),
+    "Hyderabad": (17.39, 78.49),
+    "Chennai": (13.08, 80.27),
+    "Kolkata": (22.57, 88.36),
+    "Pune": (18.52, 73.86),
+    "Ahmedabad": (23.02, 72.57),
+}
+
+
+def _linear_within(lats, lons, lat, lon, radius_km):
+    """The pre-index heatmap scan: calculate_distance per zone in Python."""
+    hits = []
+    for i in range(len(lats)):
+        if math.sqrt(((lat - lats[i]) * 111) ** 2 + ((lon - lons[i]) * 85) ** 2) <= radius_km:
+            hits.append(i)
+    return hits
+
+
+def _time_per_query(fn, queries) -> float:
+    t0 = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon)
+    return (time.perf_counter() - t0) / len(queries) * 1e6
+
+
+def bench_zones(args):
+    rng = np.random.RandomState(args.seed)
+    centres = np.array(list(INDIAN_CITIES.values()))
+    city = rng.randint(len(centres), size=args.zones)
+    # ~0.15 deg spread (~15 km) around each city centre
+    lats = centres[city, 0] + rng.normal(0, 0.15, args.zones)
+    lons = centres[city, 1] + rng.normal(0, 0.15, args.zones)
+    q_city = rng.randint(len(centres), size=args.queries)
+    queries = list(zip(centres[q_city, 0] + rng.normal(0, 0.1, args.queries),
+                       centres[q_city, 1] + rng.normal(0, 0.1, args.queries)))
+
+    t0 = time.perf_counter()
+    index = GridIndex(lats, lons, cell_km=args.radius_km)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+    linear_queries = queries[:max(1, args.queries // 50)]
+    hits = [len(index.within(lat, lon, args.radius_km)[0]) for lat, lon in queries]
+
+    return {
+        "benchmark": "zone_index",
+        "zones": args.zones,
+        "queries": args.queries,
+        "radius_km": args.radius_km,
+        "index": {"build_ms": round(build_ms, 2), "cells": len(index.cells), "cell_km": index.cell_km},
+        "mean_zones_in_radius": round(float(np.mean(hits)), 1),
+        "per_query_us": {
+            "radius_index": round(_time_per_query(lambda a, o: index.within(a, o, args.radius_km), queries), 2),
+            "nearest_index": round(_time_per_query(lambda a, o: index.nearest(a, o, 1), queries), 2),
+            "radius_linear_scan": round(_time_per_query(
+                lambda a, o: _linear_within(lat_list, lon_list, a, o, args.radius_km), linear_queries), 2),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI engine benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    modes = sub.add_parser("modes", help="Compare Chronos CPU inference modes against fp32")
+    modes.add_argument("--model", default=CHRONOS_MODELS[-1])
+    modes.add_argument("--modes", default=",".join(INFERENCE_MODES))
+    modes.add_argument("--series", type=int, default=64)
+    modes.add_argument("--batch-size", type=int, default=16)
+    modes.add_argument("--repeats", type=int, default=5)
+    modes.add_argument("--tolerance", type=float, default=0.05, help="Max mean relative deviation vs fp32")
+    modes.add_argument("--seed", type=int, default=0)
+    modes.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    modes.set_defaults(func=bench_modes)
+
+    backtest = sub.add_parser("backtest", help="Rolling-origin accuracy and speed per forecast engine")
+    backtest.add_argument("data_dir", help="Directory of daily sales series, one .csv/.json file each")
+    backtest.add_argument("--engines", default="stat/seasonal_naive,stat/ses,stat/tsb," + ",".join(CHRONOS_MODELS),
+                          help="Comma list of stat/<method> and Chronos model names")
+    backtest.add_argument("--batch-sizes", default="1,8,32")
+    backtest.add_argument("--horizon", type=int, default=FORECAST_HORIZON)
+    backtest.add_argument("--min-train", type=int, default=14)
+    backtest.add_argument("--step", type=int, default=7)
+    backtest.add_argument("--quantiles", default="0.1,0.5,0.9")
+    backtest.add_argument("--mode", default="fp32", choices=INFERENCE_MODES, help="Chronos inference mode")
+    backtest.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    backtest.set_defaults(func=bench_backtest)
+
+    zones = sub.add_parser("zones", help="Per-query cost of the micro-zone spatial index")
+    zones.add_argument("--zones", type=int, default=100_000)
+    zones.add_argument("--queries", type=int, default=2000)
+    zones.add_argument("--radius-km", type=float, default=10.0)
+    zones.add_argument("--seed", type=int, default=0)
+    zones.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    zones.set_defaults(func=bench_zones)
+
+    args = parser.parse_args(argv)
+    report = args.func(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+In-process LRU cache with per-entry expiry and hit/miss counters,
+plus a stale-while-revalidate wrapper for slow (LLM-backed) producers.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+def make_key(*parts) -> str:
+    """Content-addressed cache key: SHA-256 of the JSON-encoded parts."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def next_day_rollover(now: datetime = None) -> float:
+    """Epoch timestamp of the next local midnight (entries computed 'for today' expire there)."""
+    now = now or datetime.now()
+    midnight = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    return midnight.timestamp()
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping; each entry carries its own expiry (absolute epoch seconds).
+    With `max_bytes`, entries are also weighed by `sizeof(value)` and the least recently
+    used ones are evicted until the total fits (a single oversized value is not stored).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, max_bytes: int = None, sizeof=None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at: float = None):
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _pop(self, key):
+        # Called with self._lock held
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.max_bytes is not None:
+            stats.update(bytes=self.bytes, max_bytes=self.max_bytes)
+        return stats
+
+
+class StaleWhileRevalidate:
+    """
+    TTLCache front for slow async producers. An entry is fresh for `fresh_ttl` seconds; after
+    that it keeps being served (until its hard expiry) while a single background task recomputes it.
+    Producers return None for results that must not be cached (e.g. fallbacks); `fresh_for(value)`
+    can shorten freshness for weaker results (e.g. partial lists) so they are retried sooner.
+    A cold miss produces in its own task, so a caller that stops waiting (`timeout`) still
+    leaves the result cached for the next one.
+    """
+
+    def __init__(self, maxsize: int = 256, fresh_ttl: float = 3600.0, fresh_for=None):
+        self.cache = TTLCache(maxsize=maxsize)
+        self.fresh_ttl = fresh_ttl
+        self.fresh_for = fresh_for
+        # key -> background refresh task (references kept so tasks aren't garbage-collected)
+        self._refreshing = {}
+        self._filling = set()
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get(self, key, produce, expires_at: float = None, timeout: float = None):
+        """
+        Cached value for key; only a cold miss waits for `produce()`, raising asyncio.TimeoutError
+        after `timeout` seconds.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._fill(key, produce, expires_at))
+            self._filling.add(task)
+            task.add_done_callback(self._filling.discard)
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        value, fresh_until = entry
+        if time.time() >= fresh_until:
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(self._refresh(key, produce, expires_at))
+        return value
+
+    async def _fill(self, key, produce, expires_at: float = None):
+        value = await produce()
+        if value is not None:
+            self._store(key, value, expires_at)
+        return value
+
+    def _store(self, key, value, expires_at: float = None):
+        fresh_ttl = self.fresh_for(value) if self.fresh_for else self.fresh_ttl
+        self.cache.set(key, (value, time.time() + fresh_ttl), expires_at=expires_at)
+
+    async def _refresh(self, key, produce, expires_at: float = None):
+        try:
+            value = await produce()
+            if value is not None:
+                self._store(key, value, expires_at)
+                self.refreshes += 1
+            else:
+                self.refresh_failures += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            print(f"Background refresh failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refreshing": len(self._refreshing),
+        }
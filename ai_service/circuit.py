@@ -0,0 +1,107 @@
+"""
+Circuit breaker for a remote dependency (the hosted LLM).
+closed    -> calls flow; outcomes of the last `window` calls are kept. Once at least
+             `min_calls` are recorded and the failure share (errors + calls slower than
+             `slow_call_ms`) reaches `failure_rate`, the breaker opens.
+open      -> calls are refused instantly for `open_seconds`, then it goes half-open.
+half_open -> up to `half_open_calls` trial calls go through; if they all succeed the
+             breaker closes, and the first failure re-opens it.
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_rate: float = 0.5, min_calls: int = 5, window: int = 20,
+                 slow_call_ms: float = None, open_seconds: float = 30.0, half_open_calls: int = 1):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self._outcomes = deque(maxlen=max(window, self.min_calls))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0  # trial calls admitted while half-open
+        self._trial_successes = 0
+        self.rejected = 0
+        self.opened_count = 0
+
+    def _transition(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opened_count += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._transition(time.monotonic())
+            return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go out now (claims a trial slot when half-open)."""
+        with self._lock:
+            self._transition(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency_ms: float = None):
+        """Outcome of an admitted call; slow successes count as failures."""
+        if ok and self.slow_call_ms is not None and latency_ms is not None and latency_ms > self.slow_call_ms:
+            ok = False
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                if not ok:
+                    self._open(now)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                return
+            if self._state == OPEN:
+                return  # a call admitted before the breaker opened
+            self._outcomes.append(ok)
+            if len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+
+    def release(self):
+        """An admitted call ended without a verdict (e.g. cancelled early): frees its trial slot."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._transition(now)
+            failures = self._outcomes.count(False)
+            return {
+                "state": self._state,
+                "recent_calls": len(self._outcomes),
+                "recent_failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "open_remaining_s": round(max(0.0, self._opened_at + self.open_seconds - now), 1)
+                if self._state == OPEN else 0.0,
+                "opened_count": self.opened_count,
+                "rejected": self.rejected,
+            }
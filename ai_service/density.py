@@ -0,0 +1,72 @@
+"""
+Gridded kernel-density demand surface over micro-zones.
+Each zone contributes a Gaussian bump (weight = baseline demand x segment multiplier,
+bandwidth = zone radius). With the same equirectangular km scaling as geo_index the
+kernel is separable in x and y, so a whole H x W grid is a sum of [H, n] @ [n, W] matmuls
+over fixed-size zone chunks (memory stays bounded by the chunk, not the zone count).
+"""
+import struct
+import zlib
+
+import numpy as np
+
+from geo_index import KM_PER_DEG_LAT, KM_PER_DEG_LON
+
+# Zones further than this many bandwidths outside the grid contribute ~0 (e^-8) and are skipped
+KERNEL_CUTOFF = 4.0
+# Zones per kernel matmul; each chunk holds [H, n] and [n, W] float64 factors
+ZONE_CHUNK = 1024
+
+
+def demand_surface(lats, lons, weights, sigma_km, bbox, width: int, height: int):
+    """
+    float32 [height, width] density over bbox = (min_lon, min_lat, max_lon, max_lat),
+    sampled at cell centres; row 0 is the northern edge (image order).
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    sigma_km = np.maximum(np.asarray(sigma_km, dtype=np.float64), 1e-3)
+
+    # Cull zones whose kernel can't reach the grid
+    reach_lat = KERNEL_CUTOFF * sigma_km / KM_PER_DEG_LAT
+    reach_lon = KERNEL_CUTOFF * sigma_km / KM_PER_DEG_LON
+    keep = (
+        (lats + reach_lat >= min_lat) & (lats - reach_lat <= max_lat)
+        & (lons + reach_lon >= min_lon) & (lons - reach_lon <= max_lon)
+    )
+    if not keep.any():
+        return np.zeros((height, width), dtype=np.float32)
+    lats, lons, weights, sigma_km = lats[keep], lons[keep], weights[keep], sigma_km[keep]
+
+    xs = (min_lon + (np.arange(width) + 0.5) * (max_lon - min_lon) / width) * KM_PER_DEG_LON
+    ys = (max_lat - (np.arange(height) + 0.5) * (max_lat - min_lat) / height) * KM_PER_DEG_LAT
+    zx = lons * KM_PER_DEG_LON
+    zy = lats * KM_PER_DEG_LAT
+    inv = 1.0 / (2.0 * sigma_km ** 2)
+    surface = np.zeros((height, width), dtype=np.float64)
+    for start in range(0, len(inv), ZONE_CHUNK):
+        part = slice(start, start + ZONE_CHUNK)
+        gx = np.exp(-((xs[None, :] - zx[part, None]) ** 2) * inv[part, None])  # [n, W]
+        gy = np.exp(-((ys[:, None] - zy[None, part]) ** 2) * inv[None, part])  # [H, n]
+        surface += (gy * weights[None, part]) @ gx
+    return surface.astype(np.float32)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def encode_png_gray(pixels) -> bytes:
+    """8-bit grayscale PNG from a uint8 [height, width] array (no imaging dependency)."""
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape
+    # Filter type 0 (None) byte in front of every scanline
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels]).tobytes()
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + _png_chunk(b"IDAT", zlib.compress(raw, 6))
+        + _png_chunk(b"IEND", b"")
+    )
@@ -0,0 +1,111 @@
+"""
+Uniform grid spatial index for micro-zones.
+Points are projected with the same equirectangular scaling as main.calculate_distance
+(111 km per degree latitude, 85 km per degree longitude around Mumbai), so distances
+from the index match the existing heatmap/nearest-zone math exactly.
+"""
+import math
+
+import numpy as np
+
+KM_PER_DEG_LAT = 111.0
+KM_PER_DEG_LON = 85.0
+
+
+class GridIndex:
+    """
+    Buckets points into square cells of `cell_km`; radius and k-nearest queries only
+    look at the ring of cells that can contain an answer.
+    """
+
+    def __init__(self, lats, lons, cell_km: float = 10.0):
+        self.cell_km = cell_km
+        self.x = np.asarray(lons, dtype=np.float64) * KM_PER_DEG_LON
+        self.y = np.asarray(lats, dtype=np.float64) * KM_PER_DEG_LAT
+        self.size = len(self.x)
+
+        cx = np.floor(self.x / cell_km).astype(np.int64)
+        cy = np.floor(self.y / cell_km).astype(np.int64)
+        # Points sorted by cell so every cell is one contiguous slice of self.order
+        self.order = np.lexsort((cy, cx))
+        self.cells = {}
+        if self.size:
+            keys = np.stack([cx[self.order], cy[self.order]], axis=1)
+            breaks = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+            starts = np.concatenate([[0], breaks])
+            ends = np.concatenate([breaks, [self.size]])
+            for start, end in zip(starts, ends):
+                self.cells[(int(keys[start, 0]), int(keys[start, 1]))] = (int(start), int(end))
+
+    def _cell_of(self, qx: float, qy: float):
+        return int(math.floor(qx / self.cell_km)), int(math.floor(qy / self.cell_km))
+
+    def _candidates(self, cx: int, cy: int, ring: int, inner: int = -1):
+        """Point indices in cells whose Chebyshev cell distance from (cx, cy) is in (inner, ring]."""
+        if (2 * ring + 1) ** 2 > len(self.cells):
+            # Scanning that many cells costs more than checking every occupied one
+            keep = [
+                span for (ix, iy), span in self.cells.items()
+                if inner < max(abs(ix - cx), abs(iy - cy)) <= ring
+            ]
+            slices = [self.order[start:end] for start, end in keep]
+            return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        slices = []
+        for ix in range(cx - ring, cx + ring + 1):
+            for iy in range(cy - ring, cy + ring + 1):
+                if max(abs(ix - cx), abs(iy - cy)) <= inner:
+                    continue
+                span = self.cells.get((ix, iy))
+                if span:
+                    slices.append(self.order[span[0]:span[1]])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _distances(self, idx, qx: float, qy: float):
+        return np.sqrt((self.x[idx] - qx) ** 2 + (self.y[idx] - qy) ** 2)
+
+    def within(self, lat: float, lon: float, radius_km: float):
+        """Indices (ascending) and distances of all points within `radius_km` of (lat, lon)."""
+        if not self.size:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        qx, qy = lon * KM_PER_DEG_LON, lat * KM_PER_DEG_LAT
+        cx, cy = self._cell_of(qx, qy)
+        idx = self._candidates(cx, cy, int(math.ceil(radius_km / self.cell_km)))
+        dist = self._distances(idx, qx, qy)
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        ordered = np.argsort(idx, kind="stable")
+        return idx[ordered], dist[ordered]
+
+    def nearest(self, lat: float, lon: float, k: int = 1):
+        """Indices and distances of the k nearest points, closest first."""
+        if not self.size:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        k = min(k, self.size)
+        qx, qy = lon * KM_PER_DEG_LON, lat * KM_PER_DEG_LAT
+        cx, cy = self._cell_of(qx, qy)
+        c = self.cell_km
+        # Distance from the query to the nearest edge of its own cell
+        edge = min(qx - cx * c, (cx + 1) * c - qx, qy - cy * c, (cy + 1) * c - qy)
+
+        idx = np.empty(0, dtype=np.int64)
+        dist = np.empty(0)
+        ring = 0
+        prev = -1
+        while True:
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # Cheaper to rank every point than to keep widening the ring
+                idx = np.arange(self.size)
+                dist = self._distances(idx, qx, qy)
+                break
+            new = self._candidates(cx, cy, ring, inner=prev)
+            if len(new):
+                idx = np.concatenate([idx, new])
+                dist = np.concatenate([dist, self._distances(new, qx, qy)])
+            # Every point within edge + ring * cell_km of the query lies in the rings searched so far
+            if len(idx) >= k and np.partition(dist, k - 1)[k - 1] <= edge + ring * c:
+                break
+            prev, ring = ring, ring + 1
+
+        # Ties go to the lower index, like a linear scan would
+        best = np.lexsort((idx, dist))[:k]
+        return idx[best], dist[best]
@@ -0,0 +1,187 @@
+"""
+Micro-batching scheduler for Chronos inference.
+Forecast requests arriving within a short window are stacked into one predict call,
+and each caller's future is resolved with its own series' result.
+Inference runs on a dedicated pool of worker threads behind a bounded admission queue,
+so model load never occupies the web server's request threads.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# Rolling sample size for latency percentiles
+METRICS_WINDOW = 1000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+class InferenceQueueFull(Exception):
+    """Raised by submit() when the admission queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceBatchTooLarge(Exception):
+    """Raised by submit_many() when one request alone exceeds the admission queue (never retryable)."""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"{size} series exceed the inference queue limit of {limit}")
+        self.size = size
+        self.limit = limit
+
+
+class BatchScheduler:
+    """
+    Collects submitted contexts for up to `window_ms` (or until `max_batch_size` are queued)
+    and runs them through `predict_fn(contexts) -> list[result]` on `workers` dedicated threads.
+    At most `max_queue` contexts may wait; beyond that submit() raises InferenceQueueFull, and a
+    submit_many() larger than `max_queue` by itself raises InferenceBatchTooLarge.
+    """
+
+    def __init__(self, predict_fn, window_ms: float = 10.0, max_batch_size: int = 32,
+                 workers: int = 1, max_queue: int = 256):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._rejected = 0
+
+        # Metrics (updated by every worker thread)
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._queue_waits = deque(maxlen=METRICS_WINDOW)
+        self._predict_times = deque(maxlen=METRICS_WINDOW)
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+
+    def submit(self, context) -> Future:
+        """Queues one context window; the returned future resolves to its forecast samples."""
+        fut = Future()
+        with self._cond:
+            self._admit(1)
+            self._queue.append((context, fut, time.perf_counter()))
+            self._cond.notify()
+        return fut
+
+    def submit_many(self, contexts: list) -> list:
+        """Queues several contexts at once (all or nothing) so they are batched together where possible."""
+        now = time.perf_counter()
+        futures = [Future() for _ in contexts]
+        if not contexts:
+            return futures
+        if len(contexts) > self.max_queue:
+            # Could never be admitted, even into an empty queue: don't invite a retry
+            raise InferenceBatchTooLarge(len(contexts), self.max_queue)
+        with self._cond:
+            self._admit(len(contexts))
+            self._queue.extend((ctx, fut, now) for ctx, fut in zip(contexts, futures))
+            self._cond.notify_all()
+        return futures
+
+    def _admit(self, count: int):
+        # Called with self._cond held
+        if len(self._queue) + count > self.max_queue:
+            self._rejected += count
+            raise InferenceQueueFull(self.retry_after())
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._loop, name=f"chronos-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to drain (at least 1)."""
+        predict_s = (percentile(list(self._predict_times), 50) or 1000.0) / 1000.0
+        batches_ahead = math.ceil(len(self._queue) / self.max_batch_size / self.workers)
+        return max(1, math.ceil(batches_ahead * predict_s))
+
+    def expected_latency_ms(self) -> float:
+        """Rough latency a new request would see now: batching window, queued batches and a p50 predict."""
+        predict_ms = percentile(list(self._predict_times), 50)
+        batches_ahead = len(self._queue) // (self.max_batch_size * self.workers)
+        return self.window * 1000 + (batches_ahead + 1) * predict_ms
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = self._queue[0][2] + self.window
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch_size))]
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        # Callers may have cancelled while queued
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.predict_fn([ctx for ctx, _, _ in batch])
+        except Exception as e:
+            with self._metrics_lock:
+                self._errors += 1
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        for (_, fut, _), result in zip(batch, results):
+            fut.set_result(result)
+
+        size = len(batch)
+        with self._metrics_lock:
+            self._requests += size
+            self._batches += 1
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._queue_waits.extend((started - queued) * 1000 for _, _, queued in batch)
+            self._predict_times.append((finished - started) * 1000)
+
+    def stats(self) -> dict:
+        """Batch-size and queue-wait metrics for tuning the window against p99 latency."""
+        waits = list(self._queue_waits)
+        predict_times = list(self._predict_times)
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": len(self._queue),
+            "rejected": self._rejected,
+            "requests": self._requests,
+            "batches": self._batches,
+            "errors": self._errors,
+            "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            "queue_wait_ms": {
+                "p50": round(percentile(waits, 50), 3),
+                "p99": round(percentile(waits, 99), 3),
+                "max": round(max(waits), 3) if waits else 0.0,
+            },
+            "predict_ms": {
+                "p50": round(percentile(predict_times, 50), 3),
+                "p99": round(percentile(predict_times, 99), 3),
+            },
+        }
@@ -0,0 +1,56 @@
+"""
+Category leakage filter for generated text.
+Each BOUNDARY_MAP category is compiled once into two alternation regexes: blacklist terms
+match as whole words plus an optional plural suffix ("jean" vetoes "jeans", "tech" does not
+veto "technique"), whitelist terms match as substrings ("veg" accepts "vegetables"). One scan
+per list reports every term that hit.
+"""
+import re
+
+
+def _alternation(terms, word_boundary: bool):
+    # Longest first so "dry fruits" wins over "dry", and duplicates collapse
+    unique = sorted({t.lower() for t in terms if t}, key=lambda t: (-len(t), t))
+    if not unique:
+        return None
+    body = "|".join(re.escape(t) for t in unique)
+    return re.compile(rf"\b(?:{body})(?:s|es)?\b" if word_boundary else f"(?:{body})", re.IGNORECASE)
+
+
+def _hits(pattern, text: str) -> list:
+    if pattern is None:
+        return []
+    # dict.fromkeys keeps first-seen order while de-duplicating
+    return list(dict.fromkeys(m.group(0).lower() for m in pattern.finditer(text)))
+
+
+class CategoryMatcher:
+    """Compiled whitelist/blacklist for one category."""
+
+    def __init__(self, whitelist: list, blacklist: list):
+        self.whitelist = _alternation(whitelist, word_boundary=False)
+        self.blacklist = _alternation(blacklist, word_boundary=True)
+
+    def blacklist_hits(self, text: str) -> list:
+        return _hits(self.blacklist, text)
+
+    def whitelist_hits(self, text: str) -> list:
+        return _hits(self.whitelist, text)
+
+    def check(self, text: str, require_whitelist: bool = False) -> dict:
+        """
+        {"clean", "blacklist_hits", "whitelist_hits"}: clean when no blacklist term appears and,
+        if `require_whitelist`, at least one whitelist term does.
+        """
+        blacklist_hits = self.blacklist_hits(text)
+        whitelist_hits = self.whitelist_hits(text)
+        clean = not blacklist_hits and (bool(whitelist_hits) or not require_whitelist)
+        return {"clean": clean, "blacklist_hits": blacklist_hits, "whitelist_hits": whitelist_hits}
+
+
+def build_matchers(boundary_map: dict) -> dict:
+    """category -> CategoryMatcher for every entry of a BOUNDARY_MAP-shaped dict."""
+    return {
+        category: CategoryMatcher(rules.get("whitelist", []), rules.get("blacklist", []))
+        for category, rules in boundary_map.items()
+    }
@@ -0,0 +1,302 @@
+"""
+Async LLM access for the insight endpoints.
+LLMClient owns the cross-cutting policy (an asyncio.Semaphore capping concurrent calls,
+the optional circuit breaker, call stats) and delegates the completion itself to a
+pluggable backend:
+  - HFBackend: Hugging Face router (OpenAI-compatible), needs a token
+  - OpenAICompatibleBackend: any /v1/chat/completions server (vLLM, llama.cpp, Ollama, ...)
+  - MockBackend: deterministic in-process stand-in with configurable latency and canned JSON
+HTTP backends share one pooled keep-alive httpx.AsyncClient per process, so a slow
+completion only parks its own coroutine instead of blocking the event loop.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+
+import httpx
+
+DEFAULT_BASE_URL = "https://router.huggingface.co/v1"
+DEFAULT_LOCAL_URL = "http://localhost:8001/v1"
+DEFAULT_MODEL = "meta-llama/Meta-Llama-3-8B-Instruct"
+BACKENDS = ["hf", "openai", "mock"]
+
+
+class LLMError(Exception):
+    """The LLM is not configured, or a completion failed / came back malformed."""
+
+
+class LLMUnavailable(LLMError):
+    """Refused without calling out: the circuit breaker is open."""
+
+
+class OpenAICompatibleBackend:
+    """POST {base_url}/chat/completions over a pooled keep-alive session."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str = DEFAULT_LOCAL_URL, model: str = DEFAULT_MODEL, token: str = None,
+                 max_connections: int = 8, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.token = token
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        self._http = None
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def _session(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.token}"} if self.token else {},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._http
+
+    async def complete(self, messages: list, max_tokens: int, temperature: float) -> str:
+        try:
+            resp = await self._session().post("/chat/completions", json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            })
+            resp.raise_for_status()
+            return resp.json()["choices"][0]["message"]["content"] or ""
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class HFBackend(OpenAICompatibleBackend):
+    """Hugging Face inference router; unavailable without a token."""
+
+    name = "hf"
+
+    def __init__(self, token: str = None, base_url: str = DEFAULT_BASE_URL, **kwargs):
+        super().__init__(base_url=base_url, token=token, **kwargs)
+
+    @property
+    def available(self) -> bool:
+        return bool(self.token)
+
+
+def canned_reply(messages: list) -> str:
+    """
+    Deterministic stand-in completion for the prompts main.py sends: a verdict for product
+    validation, 3 audit items for inventory, and 3 outlook items built from the prompt's own
+    allowed themes (so they pass the leakage filter) for the seasonal outlook.
+    """
+    system = messages[0]["content"] if messages else ""
+    prompt = messages[-1]["content"] if messages else ""
+    if "VALID or INVALID" in system:
+        return "VALID"
+    if "INVENTORY STATE" in prompt:
+        items = re.findall(r"^\s*- (.+?) \(", prompt, flags=re.MULTILINE) or ["Core Inventory"]
+        return json.dumps([
+            {"event": "Dead Stock Liquidation", "type": "RISK", "categories": [items[0]],
+             "insight": f"Bundle {items[0]} with fast movers this weekend to clear slow stock."},
+            {"event": "Priority Restock", "type": "RISK", "categories": [items[-1]],
+             "insight": f"Reorder {items[-1]} before the weekend footfall peak."},
+            {"event": "Cluster Growth", "type": "OPPORTUNITY", "categories": items[:2],
+             "insight": "Cross-promote the top category cluster at the counter."},
+        ])
+    category = re.search(r"ACTIVE_CATEGORY: (.+)", prompt)
+    category = category.group(1).strip() if category else "General"
+    themes = re.search(r"allowed themes: (.*?)\.\.\.", prompt)
+    themes = [t.strip() for t in themes.group(1).split(",") if t.strip()] if themes else []
+    themes = themes or [category.lower()]
+    outlook = [
+        {
+            "event": f"{themes[i % len(themes)].title()} Demand Window",
+            "type": category,
+            "categories": [themes[i % len(themes)], themes[(i + 1) % len(themes)]],
+            "insight": f"Stock {themes[i % len(themes)]} ahead of the horizon; high velocity expected.",
+        }
+        for i in range(3)
+    ]
+    return "```json\n" + json.dumps(outlook) + "\n```"
+
+
+class MockBackend:
+    """
+    In-process stand-in: sleeps latency_ms (+ up to jitter_ms) and returns canned_reply(), or
+    raises LLMError for an `error_rate` share of calls. Seeded, so a run is reproducible.
+    """
+
+    name = "mock"
+
+    def __init__(self, latency_ms: float = 200.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0, reply=canned_reply):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.reply = reply
+        self._rng = random.Random(seed)
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def complete(self, messages: list, max_tokens: int, temperature: float) -> str:
+        delay_ms = self.latency_ms + self._rng.random() * self.jitter_ms
+        fail = self._rng.random() < self.error_rate
+        await asyncio.sleep(delay_ms / 1000)
+        if fail:
+            raise LLMError("mock backend: injected failure")
+        return self.reply(messages)
+
+    async def aclose(self):
+        pass
+
+
+def make_backend(kind: str, token: str = None, base_url: str = None, model: str = DEFAULT_MODEL,
+                 max_connections: int = 8, timeout: float = 30.0, mock_latency_ms: float = 200.0,
+                 mock_jitter_ms: float = 0.0, mock_error_rate: float = 0.0):
+    """Backend by name (see BACKENDS)."""
+    if kind == "hf":
+        return HFBackend(token=token, base_url=base_url or DEFAULT_BASE_URL, model=model,
+                         max_connections=max_connections, timeout=timeout)
+    if kind == "openai":
+        return OpenAICompatibleBackend(base_url=base_url or DEFAULT_LOCAL_URL, model=model, token=token,
+                                       max_connections=max_connections, timeout=timeout)
+    if kind == "mock":
+        return MockBackend(latency_ms=mock_latency_ms, jitter_ms=mock_jitter_ms, error_rate=mock_error_rate)
+    raise ValueError(f"Unknown LLM backend {kind!r}; expected one of {BACKENDS}")
+
+
+class LLMClient:
+    def __init__(self, backend, max_concurrency: int = 8, breaker=None):
+        self.backend = backend
+        self.max_concurrency = max(1, max_concurrency)
+        # Optional circuit.CircuitBreaker shared by every caller of this client
+        self.breaker = breaker
+        self._semaphore = None
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+    @property
+    def model(self) -> str:
+        return getattr(self.backend, "model", self.backend.name)
+
+    @property
+    def available(self) -> bool:
+        return self.backend.available
+
+    @property
+    def accepting(self) -> bool:
+        """Configured and not short-circuited (a cheap pre-check before building a prompt)."""
+        return self.available and (self.breaker is None or self.breaker.state != "open")
+
+    async def chat(self, messages: list, max_tokens: int = 256, temperature: float = 0.1) -> str:
+        """Content of one chat completion."""
+        if not self.available:
+            raise LLMError(f"LLM backend '{self.backend.name}' is not configured")
+        if self.breaker is not None and not self.breaker.allow():
+            raise LLMUnavailable("circuit open: LLM backend is failing")
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        ok = None
+        elapsed_ms = None
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    content = await self.backend.complete(messages, max_tokens, temperature)
+                    ok = True
+                except LLMError:
+                    ok = False
+                    self.errors += 1
+                    raise
+                finally:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self.in_flight -= 1
+                    self.calls += 1
+                    self.total_ms += elapsed_ms
+        finally:
+            if self.breaker is not None:
+                if ok is not None:
+                    self.breaker.record(ok, elapsed_ms)
+                elif elapsed_ms is not None and self.breaker.slow_call_ms is not None \
+                        and elapsed_ms > self.breaker.slow_call_ms:
+                    self.breaker.record(False)  # cancelled, but already slower than the threshold
+                else:
+                    self.breaker.release()  # cancelled (deadline / hedge) before a verdict
+        return content
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "model": self.model,
+            "available": self.available,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+        }
+
+
+async def hedged(attempt, attempts: int, on_result, hedge_delay_s: float = None):
+    """
+    Runs up to `attempts` calls of `attempt(i)` (a coroutine function), feeding each result to
+    `on_result`, which returns True once enough has been collected; outstanding calls are then
+    cancelled. A new attempt starts whenever one finishes without satisfying `on_result`, and
+    with `hedge_delay_s` set also once that long has passed since the last launch (0 = all at once).
+    Without a delay this is a plain sequential retry loop.
+    """
+    pending = set()
+    launched = 0
+    last_launch = 0.0
+    loop = asyncio.get_running_loop()
+
+    def launch():
+        nonlocal launched, last_launch
+        pending.add(asyncio.ensure_future(attempt(launched)))
+        launched += 1
+        last_launch = loop.time()
+
+    launch()
+    try:
+        while pending:
+            timeout = None
+            if hedge_delay_s is not None and launched < attempts:
+                timeout = max(0.0, last_launch + hedge_delay_s - loop.time())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()  # hedge: the in-flight attempts are taking too long
+                continue
+            for task in done:
+                pending.discard(task)
+                if on_result(task.result()):
+                    return
+                # Replace the finished attempt (a retry)
+                if launched < attempts:
+                    launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -1,102 +1,118 @@
-from fastapi import FastAPI, Query  # Query used for optional heatmap lat/lon
+from fastapi import FastAPI, Header, HTTPException, Query  # Query used for optional heatmap lat/lon
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import numpy as np
 import random
 from datetime import datetime, timedelta
 import math
-import pandas as pd
 import logging
 import os
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
-import torch
 from forecast_interpreter import interpret_forecast
+from inference import BatchScheduler, InferenceBatchTooLarge, InferenceQueueFull
+from leakage import build_matchers
+from llm import DEFAULT_MODEL, LLMClient, hedged, make_backend
+from cache import StaleWhileRevalidate, TTLCache, make_key, next_day_rollover
+from circuit import CircuitBreaker
+from model_loader import ModelState
+from singleflight import SingleFlight
+import stat_engine
+from density import demand_surface, encode_png_gray
+from geo_index import KM_PER_DEG_LAT, KM_PER_DEG_LON
+import mvt
+from zones import ZoneRegistry, category_profile_matrix, segment_profile_arrays
 
 # Load environment variables
 load_dotenv()
 HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 
-# Initialize Hugging Face Models (for seasonal text insights only)
-client = InferenceClient(token=HF_TOKEN) if os.getenv("HUGGINGFACE_TOKEN") else None
+# Chat LLM for the seasonal outlook, product validation and inventory audit. LLM_BACKEND picks
+# hf (hosted Llama-3), openai (any OpenAI-compatible server, e.g. a local model or
+# mock_llm_server.py) or mock (in-process, no network, for load tests).
+# LLM_MAX_CONCURRENCY caps simultaneous calls per worker.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "hf")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+llm = LLMClient(
+    make_backend(
+        LLM_BACKEND,
+        token=HF_TOKEN if LLM_BACKEND == "hf" else os.getenv("LLM_API_KEY"),
+        base_url=os.getenv("LLM_BASE_URL") or None,
+        model=os.getenv("LLM_MODEL", DEFAULT_MODEL),
+        max_connections=LLM_MAX_CONCURRENCY,
+        timeout=float(os.getenv("LLM_TIMEOUT_S", "30")),
+        mock_latency_ms=float(os.getenv("MOCK_LLM_LATENCY_MS", "200")),
+        mock_jitter_ms=float(os.getenv("MOCK_LLM_JITTER_MS", "0")),
+        mock_error_rate=float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+    ),
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    # Trips on error/slow-call share so a degraded backend gets instant fallbacks instead of retries
+    breaker=CircuitBreaker(
+        failure_rate=float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),
+        min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+        window=20,
+        slow_call_ms=float(os.getenv("LLM_BREAKER_SLOW_MS", "15000")),
+        open_seconds=float(os.getenv("LLM_BREAKER_OPEN_S", "30")),
+        half_open_calls=1,
+    ),
+)
 
-# Amazon Chronos-2 for time-series predictions (replaces Meta Llama for forecasting)
-try:
-    from chronos import ChronosPipeline
-    chronos_pipeline = ChronosPipeline.from_pretrained(
-        "amazon/chronos-2",
-        device_map="cpu",
-        torch_dtype=torch.float32,
-    )
-    CHRONOS_MODEL = "amazon/chronos-2"
-except Exception as e:
-    print(f"Chronos-2 load failed ({e}), falling back to chronos-t5-tiny")
-    from chronos import ChronosPipeline
-    chronos_pipeline = ChronosPipeline.from_pretrained(
-        "amazon/chronos-t5-tiny",
-        device_map="cpu",
-        torch_dtype=torch.float32,
-    )
-    CHRONOS_MODEL = "amazon/chronos-t5-tiny"
+# Amazon Chronos-2 for time-series predictions (replaces Meta Llama for forecasting).
+# Loaded in the background after startup (falls back to chronos-t5-tiny) so the API boots instantly.
+# CHRONOS_INFERENCE_MODE picks fp32 / bf16 / int8 / compile (compare them with `python bench.py modes`).
+# CHRONOS_SHARED_WEIGHTS_DIR lets multiple uvicorn workers mmap one copy of the weights.
+chronos_state = ModelState(
+    mode=os.getenv("CHRONOS_INFERENCE_MODE", "fp32"),
+    share_dir=os.getenv("CHRONOS_SHARED_WEIGHTS_DIR") or None,
+)
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def _start_model_loading():
+    chronos_state.start()
+
+
+@app.on_event("shutdown")
+async def _close_llm_client():
+    await llm.aclose()
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once the forecast model is loaded (and which one), 503 while warming."""
+    status = chronos_state.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browser clients need these to read cached heatmaps and binary grid metadata
+    expose_headers=["ETag", "X-Grid-Width", "X-Grid-Height", "X-Grid-BBox", "X-Grid-Max"],
 )
 
 # Disable Prophet's verbose logging
 logging.getLogger('prophet').setLevel(logging.WARNING)
 
 # --- Configuration & Data ---
-SHOP_LOCATION = {"lat": 19.0726, "lon": 72.8845}
-
-# Micro-Zones prioritized for concentrated Mumbai SMEs
-MICRO_ZONES = [
-    {
-        "id": "kurla_west",
-        "name": "Kurla West Residential",
-        "center": {"lat": 19.0750, "lon": 72.8800},
-        "radius": 1000,
-        "profile": "Residential",
-        "historical_baseline": 65
-    },
-    {
-        "id": "bkc_district",
-        "name": "BKC Business Hub",
-        "center": {"lat": 19.0600, "lon": 72.8600},
-        "radius": 1200,
-        "profile": "Commercial",
-        "historical_baseline": 85
-    },
-    {
-        "id": "vidyavihar_hub",
-        "name": "Vidyavihar University Cluster",
-        "center": {"lat": 19.0800, "lon": 72.8950},
-        "radius": 1000,
-        "profile": "Academic",
-        "historical_baseline": 40
-    },
-    {
-        "id": "ghatkopar_market",
-        "name": "Ghatkopar Central Market",
-        "center": {"lat": 19.0850, "lon": 72.9080},
-        "radius": 1100,
-        "profile": "Temple",
-        "historical_baseline": 55
-    },
-    {
-        "id": "chembur_colony",
-        "name": "Chembur Residential Colony",
-        "center": {"lat": 19.0522, "lon": 72.9005},
-        "radius": 1300,
-        "profile": "Residential",
-        "historical_baseline": 45
-    }
-]
+# Micro-zones (prioritized for concentrated Mumbai SMEs) and the default shop location live in
+# a GeoJSON/Parquet file, reloaded automatically when it changes.
+ZONES_FILE = os.getenv("ZONES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zones.geojson"))
+ZONES_RELOAD_INTERVAL_S = float(os.getenv("ZONES_RELOAD_INTERVAL_S", "5"))
+DEFAULT_SHOP_LOCATION = {"lat": 19.0726, "lon": 72.8845}
 
 # Category Demand Profiles (Multipliers for [Residential, Commercial, Academic, Temple])
 # Format: category_id: { profile_name: [multiplier, reason] }
@@ -233,66 +249,365 @@ CATEGORY_PROFILES = {
 def calculate_distance(lat1, lon1, lat2, lon2):
     return math.sqrt(((lat1-lat2)*111)**2 + ((lon1-lon2)*85)**2)
 
-@app.get("/heatmap")
-def get_heatmap(segment: str = "apparel", lat: float = Query(None), lon: float = Query(None)):
-    features = []
-    if lat is not None and lon is not None:
-        shop_location = {"lat": lat, "lon": lon}
-    else:
-        shop_location = SHOP_LOCATION
-    shop_lat = shop_location["lat"]
-    shop_lon = shop_location["lon"]
-    
+# Heatmap only shows zones within this distance of the shop
+HEATMAP_RADIUS_KM = 10
+
+# Zone fields as NumPy arrays plus the spatial index over their centres, swapped atomically on reload
+zone_registry = ZoneRegistry(
+    ZONES_FILE,
+    default_shop_location=DEFAULT_SHOP_LOCATION,
+    cell_km=HEATMAP_RADIUS_KM,
+    reload_interval=ZONES_RELOAD_INTERVAL_S,
+)
+
+
+def _normalize_segment(segment: str) -> str:
     # Normalize segment input (e.g., matching frontend options)
-    segment_key = segment.lower().replace(" ", "_").replace("&", "").replace("/", "_").replace("__", "_")
-    
-    profile_data = CATEGORY_PROFILES.get(segment_key, {})
-    
-    for zone in MICRO_ZONES:
-        dist = calculate_distance(shop_lat, shop_lon, zone["center"]["lat"], zone["center"]["lon"])
-        
-        if dist > 10:
-            continue
+    return segment.lower().replace(" ", "_").replace("&", "").replace("/", "_").replace("__", "_")
 
-        base = zone["historical_baseline"]
-        profile = zone["profile"]
-        
-        # Determine multiplier and reason from mapping or default
-        if profile in profile_data:
-            multiplier = profile_data[profile][0]
-            reason = profile_data[profile][1]
-        else:
-            # Subtle default variability if not explicitly mapped
-            multiplier = 0.95 + (random.random() * 0.1) # 0.95 to 1.05
-            reason = f"Baseline trend for {segment.title()} in {profile} zone."
 
-        current_demand = base * multiplier
-        spike_percentage = ((current_demand - base) / base) * 100
-        
+def _category_matrix(snapshot):
+    """CATEGORY_PROFILES as a dense category x profile matrix for this zone snapshot, plus a row lookup."""
+    if "category_matrix" not in snapshot.derived:
+        categories, mults, reasons = category_profile_matrix(CATEGORY_PROFILES, snapshot.zones.profiles)
+        rows = {category: i for i, category in enumerate(categories)}
+        snapshot.derived["category_matrix"] = (rows, mults, reasons)
+    return snapshot.derived["category_matrix"]
+
+
+def _segment_arrays(snapshot, segment_key: str):
+    """Per-profile multiplier/reason lookup for a segment (all unmapped for unknown segments)."""
+    rows, mults, reasons = _category_matrix(snapshot)
+    row = rows.get(segment_key)
+    if row is None:
+        return segment_profile_arrays({}, snapshot.zones.profiles)
+    return mults[row], reasons[row]
+
+
+# Heatmap bodies are a pure function of (segment, shop cell, day, zone version): cached until
+# midnight and served with strong ETags. Shop coordinates snap to a HEATMAP_CELL_DEG grid (~110 m).
+HEATMAP_CELL_DEG = float(os.getenv("HEATMAP_CELL_DEG", "0.001"))
+HEATMAP_CACHE_SIZE = int(os.getenv("HEATMAP_CACHE_SIZE", "2048"))
+heatmap_cache = TTLCache(maxsize=HEATMAP_CACHE_SIZE)
+
+
+def _shop_cell(snapshot, lat: float = None, lon: float = None) -> dict:
+    if lat is None or lon is None:
+        return snapshot.shop_location
+    q = HEATMAP_CELL_DEG
+    return {"lat": round(round(lat / q) * q, 6), "lon": round(round(lon / q) * q, 6)}
+
+
+def _default_multipliers(segment_key: str, profiles: list, day: str):
+    """Subtle default variability (0.95 to 1.05) for unmapped profiles, fixed per (segment, profile, day)."""
+    return np.array([0.95 + random.Random(f"{segment_key}:{profile}:{day}").random() * 0.1 for profile in profiles])
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def _cached_response(key: str, build, now, if_none_match: str = None, cache: TTLCache = heatmap_cache) -> Response:
+    """
+    Serves build() -> (body bytes, media type, extra headers) from `cache`, or 304 when
+    the client already holds that body.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        body, media_type, extra = build()
+        entry = (body, media_type, {**extra, "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"'})
+        cache.set(key, entry, expires_at=next_day_rollover(now))
+    body, media_type, extra = entry
+    # no-cache: browsers keep the body but revalidate, which costs a 304 instead of a rebuild
+    headers = {**extra, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, extra["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _cached_json(key: str, build, now, if_none_match: str = None) -> Response:
+    def build_json():
+        return json.dumps(build(), separators=(",", ":")).encode("utf-8"), "application/json", {}
+
+    return _cached_response(key, build_json, now, if_none_match)
+
+
+@app.get("/heatmap")
+def get_heatmap(
+    segment: str = "apparel",
+    lat: float = Query(None),
+    lon: float = Query(None),
+    exact: bool = Query(False),  # haversine distances instead of the fast equirectangular ones
+    if_none_match: str = Header(None),
+):
+    snapshot = zone_registry.current()
+    shop_location = _shop_cell(snapshot, lat, lon)
+    now = datetime.now()
+    day = now.strftime("%Y-%m-%d")
+    key = make_key("heatmap", snapshot.version, segment, shop_location, exact, day)
+    return _cached_json(key, lambda: _build_heatmap(snapshot, segment, shop_location, exact, day), now, if_none_match)
+
+
+def _build_heatmap(snapshot, segment: str, shop_location: dict, exact: bool, day: str) -> dict:
+    zones = snapshot.zones
+    segment_key = _normalize_segment(segment)
+    seg_mults, seg_reasons = _segment_arrays(snapshot, segment_key)
+    seg_mults = np.where(np.isnan(seg_mults), _default_multipliers(segment_key, zones.profiles, day), seg_mults)
+
+    # One vectorized pass: distance cut, multiplier lookup and spike
+    idx, dist = zones.within(shop_location["lat"], shop_location["lon"], HEATMAP_RADIUS_KM, exact=exact)
+    profile_idx = zones.profile_idx[idx]
+    multiplier = seg_mults[profile_idx]
+    # ((base * multiplier - base) / base) * 100
+    spike_percentage = (multiplier - 1.0) * 100
+
+    features = []
+    for i, zone_idx in enumerate(idx.tolist()):
+        profile = zones.profiles[profile_idx[i]]
+        reason = seg_reasons[profile_idx[i]] or f"Baseline trend for {segment.title()} in {profile} zone."
         features.append({
             "type": "Feature",
             "geometry": {
                 "type": "Point",
-                "coordinates": [zone["center"]["lon"], zone["center"]["lat"]]
+                "coordinates": [float(zones.lon[zone_idx]), float(zones.lat[zone_idx])]
             },
             "properties": {
-                "id": zone["id"],
-                "name": zone["name"],
-                "multiplier": multiplier,
+                "id": zones.ids[zone_idx],
+                "name": zones.names[zone_idx],
+                "multiplier": float(multiplier[i]),
                 "reason": reason,
-                "spike": f"{spike_percentage:+.0f}%",
-                "distance": dist,
-                "radius": zone["radius"],
-                "profile": zone["profile"]
+                "spike": f"{spike_percentage[i]:+.0f}%",
+                "distance": float(dist[i]),
+                "radius": float(zones.radius[zone_idx]),
+                "profile": profile
             }
         })
-            
+
     return {
         "type": "FeatureCollection",
         "features": features,
         "shop_location": shop_location
     }
 
+
+@app.get("/heatmap/matrix")
+def get_heatmap_matrix(
+    segments: str = Query(None),  # comma-separated; defaults to every category
+    lat: float = Query(None),
+    lon: float = Query(None),
+    exact: bool = Query(False),
+    if_none_match: str = Header(None),
+):
+    """
+    Demand multipliers for several segments x every nearby zone in one response, so the map
+    can switch categories client-side. multipliers[s][z] lines up with segments[s] and zones[z];
+    reasons[s][p] with profiles[p] (each zone carries its profile index).
+    """
+    snapshot = zone_registry.current()
+    shop_location = _shop_cell(snapshot, lat, lon)
+    now = datetime.now()
+    day = now.strftime("%Y-%m-%d")
+    key = make_key("heatmap_matrix", snapshot.version, segments, shop_location, exact, day)
+    return _cached_json(
+        key, lambda: _build_heatmap_matrix(snapshot, segments, shop_location, exact, day), now, if_none_match
+    )
+
+
+def _build_heatmap_matrix(snapshot, segments: str, shop_location: dict, exact: bool, day: str) -> dict:
+    zones = snapshot.zones
+    rows, mults, reasons = _category_matrix(snapshot)
+    if segments:
+        requested = [s.strip() for s in segments.split(",") if s.strip()]
+    else:
+        requested = list(rows)
+    segment_keys = [_normalize_segment(s) for s in requested]
+    # Unknown segments get an all-default row, like /heatmap
+    seg_mults = np.empty((len(segment_keys), len(zones.profiles)))
+    seg_reasons = []
+    for i, key in enumerate(segment_keys):
+        row = rows.get(key)
+        defaults = _default_multipliers(key, zones.profiles, day)
+        seg_mults[i] = defaults if row is None else np.where(np.isnan(mults[row]), defaults, mults[row])
+        row_reasons = reasons[row] if row is not None else [None] * len(zones.profiles)
+        seg_reasons.append([
+            reason or f"Baseline trend for {requested[i].title()} in {profile} zone."
+            for reason, profile in zip(row_reasons, zones.profiles)
+        ])
+
+    idx, dist = zones.within(shop_location["lat"], shop_location["lon"], HEATMAP_RADIUS_KM, exact=exact)
+    profile_idx = zones.profile_idx[idx]
+    # [segments, zones] gather from the dense matrix
+    multiplier = seg_mults[:, profile_idx]
+
+    return {
+        "segments": segment_keys,
+        "profiles": list(zones.profiles),
+        "zones": [
+            {
+                "id": zones.ids[zone_idx],
+                "name": zones.names[zone_idx],
+                "coordinates": [float(zones.lon[zone_idx]), float(zones.lat[zone_idx])],
+                "distance": float(dist[i]),
+                "radius": float(zones.radius[zone_idx]),
+                "profile": int(profile_idx[i]),
+            }
+            for i, zone_idx in enumerate(idx.tolist())
+        ],
+        "multipliers": np.round(multiplier, 4).tolist(),
+        "reasons": seg_reasons,
+        "shop_location": shop_location,
+    }
+
+# Demand surface grid size limits (cells per side)
+HEATMAP_GRID_DEFAULT = 128
+HEATMAP_GRID_MAX = int(os.getenv("HEATMAP_GRID_MAX", "1024"))
+# Grid bodies run up to HEATMAP_GRID_MAX^2 x 4 bytes, so they get their own cache bounded by
+# total body size, and client bboxes snap outward to the HEATMAP_CELL_DEG grid before keying.
+HEATMAP_GRID_CACHE_MB = float(os.getenv("HEATMAP_GRID_CACHE_MB", "64"))
+grid_cache = TTLCache(
+    maxsize=HEATMAP_CACHE_SIZE,
+    max_bytes=int(HEATMAP_GRID_CACHE_MB * 1024 * 1024),
+    sizeof=lambda entry: len(entry[0]),
+)
+
+
+def _snap_bbox(bounds: tuple) -> tuple:
+    q = HEATMAP_CELL_DEG
+    min_lon, min_lat, max_lon, max_lat = bounds
+    return (
+        round(math.floor(min_lon / q) * q, 6),
+        round(math.floor(min_lat / q) * q, 6),
+        round(math.ceil(max_lon / q) * q, 6),
+        round(math.ceil(max_lat / q) * q, 6),
+    )
+
+
+@app.get("/heatmap/grid")
+def get_heatmap_grid(
+    segment: str = "apparel",
+    lat: float = Query(None),
+    lon: float = Query(None),
+    bbox: str = Query(None),  # min_lon,min_lat,max_lon,max_lat; defaults to HEATMAP_RADIUS_KM around the shop
+    width: int = Query(HEATMAP_GRID_DEFAULT, ge=1),
+    height: int = Query(HEATMAP_GRID_DEFAULT, ge=1),
+    format: str = Query("f32"),  # f32: raw little-endian float32, row-major, north row first; png: 8-bit grayscale
+    if_none_match: str = Header(None),
+):
+    """
+    Kernel-density demand surface: each zone adds a Gaussian of weight baseline x segment
+    multiplier and bandwidth = its radius. Grid shape, bbox and the PNG scale (density of a
+    white pixel) come back in X-Grid-* headers.
+    """
+    if format not in ("f32", "png"):
+        raise HTTPException(status_code=400, detail="format must be 'f32' or 'png'")
+    if width > HEATMAP_GRID_MAX or height > HEATMAP_GRID_MAX:
+        raise HTTPException(status_code=400, detail=f"width and height must be <= {HEATMAP_GRID_MAX}")
+    snapshot = zone_registry.current()
+    if bbox:
+        try:
+            bounds = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if (
+            len(bounds) != 4
+            or not all(math.isfinite(v) for v in bounds)
+            or not (-180 <= bounds[0] < bounds[2] <= 180 and -90 <= bounds[1] < bounds[3] <= 90)
+        ):
+            raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+        bounds = _snap_bbox(bounds)
+    else:
+        shop = _shop_cell(snapshot, lat, lon)
+        d_lat = HEATMAP_RADIUS_KM / KM_PER_DEG_LAT
+        d_lon = HEATMAP_RADIUS_KM / KM_PER_DEG_LON
+        bounds = (shop["lon"] - d_lon, shop["lat"] - d_lat, shop["lon"] + d_lon, shop["lat"] + d_lat)
+
+    now = datetime.now()
+    day = now.strftime("%Y-%m-%d")
+    key = make_key("heatmap_grid", snapshot.version, segment, bounds, width, height, format, day)
+    return _cached_response(
+        key, lambda: _build_heatmap_grid(snapshot, segment, bounds, width, height, format, day), now, if_none_match,
+        cache=grid_cache,
+    )
+
+
+def _build_heatmap_grid(snapshot, segment: str, bounds: tuple, width: int, height: int, fmt: str, day: str):
+    zones = snapshot.zones
+    segment_key = _normalize_segment(segment)
+    seg_mults, _ = _segment_arrays(snapshot, segment_key)
+    seg_mults = np.where(np.isnan(seg_mults), _default_multipliers(segment_key, zones.profiles, day), seg_mults)
+    weights = zones.baseline * seg_mults[zones.profile_idx]
+    # Zone radii are in metres
+    surface = demand_surface(zones.lat, zones.lon, weights, zones.radius / 1000.0, bounds, width, height)
+
+    peak = float(surface.max()) if surface.size else 0.0
+    headers = {
+        "X-Grid-Width": str(width),
+        "X-Grid-Height": str(height),
+        "X-Grid-BBox": ",".join(f"{v:.6f}" for v in bounds),
+        "X-Grid-Max": f"{peak:.6g}",
+    }
+    if fmt == "png":
+        scaled = surface / peak if peak > 0 else surface
+        return encode_png_gray(np.round(scaled * 255)), "image/png", headers
+    return surface.astype("<f4").tobytes(), "application/octet-stream", headers
+
+# Vector tiles are cached per (segment, tile, day, zone version, profile table version)
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "8192"))
+tile_cache = TTLCache(maxsize=TILE_CACHE_SIZE)
+CATEGORY_PROFILES_VERSION = make_key(CATEGORY_PROFILES)[:12]
+MAX_TILE_ZOOM = 22
+
+
+@app.get("/tiles/{segment}/{z}/{x}/{y}.mvt")
+def get_zone_tile(segment: str, z: int, x: int, y: int, if_none_match: str = Header(None)):
+    """Mapbox Vector Tile with a 'zones' layer: one clipped circle polygon per zone, with its demand properties."""
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="tile out of range")
+    snapshot = zone_registry.current()
+    now = datetime.now()
+    day = now.strftime("%Y-%m-%d")
+    key = make_key("tile", snapshot.version, CATEGORY_PROFILES_VERSION, segment, z, x, y, day)
+    return _cached_response(
+        key, lambda: _build_zone_tile(snapshot, segment, z, x, y, day), now, if_none_match, cache=tile_cache
+    )
+
+
+def _build_zone_tile(snapshot, segment: str, z: int, x: int, y: int, day: str):
+    zones = snapshot.zones
+    segment_key = _normalize_segment(segment)
+    seg_mults, _ = _segment_arrays(snapshot, segment_key)
+    seg_mults = np.where(np.isnan(seg_mults), _default_multipliers(segment_key, zones.profiles, day), seg_mults)
+
+    # Candidate zones: everything within the tile's half-diagonal plus the largest zone radius
+    min_lon, min_lat, max_lon, max_lat = mvt.tile_bounds(z, x, y)
+    half_diag = math.hypot((max_lon - min_lon) * KM_PER_DEG_LON, (max_lat - min_lat) * KM_PER_DEG_LAT) / 2
+    reach = half_diag + (float(zones.radius.max()) / 1000.0 if len(zones) else 0.0)
+    idx, _ = zones.index.within((min_lat + max_lat) / 2, (min_lon + max_lon) / 2, reach)
+
+    features = []
+    for zone_idx in idx.tolist():
+        zone_lat, zone_lon = float(zones.lat[zone_idx]), float(zones.lon[zone_idx])
+        cx, cy = mvt.to_tile_coords(zone_lon, zone_lat, z, x, y)
+        r = mvt.meters_to_tile_units(float(zones.radius[zone_idx]), zone_lat, z)
+        if cx + r < -mvt.BUFFER or cx - r > mvt.EXTENT + mvt.BUFFER or cy + r < -mvt.BUFFER or cy - r > mvt.EXTENT + mvt.BUFFER:
+            continue
+        ring = mvt.clip_ring(mvt.circle_ring(cx, cy, r), -mvt.BUFFER, mvt.EXTENT + mvt.BUFFER)
+        profile_i = zones.profile_idx[zone_idx]
+        multiplier = float(seg_mults[profile_i])
+        features.append((zone_idx + 1, ring, {
+            "id": zones.ids[zone_idx],
+            "name": zones.names[zone_idx],
+            "profile": zones.profiles[profile_i],
+            "multiplier": round(multiplier, 4),
+            "spike": f"{(multiplier - 1.0) * 100:+.0f}%",
+            "baseline": float(zones.baseline[zone_idx]),
+        }))
+    return mvt.encode_layer("zones", features), "application/vnd.mapbox-vector-tile", {}
+
 # --- Absolute Semantic Whitelist (Zero Leakage Enforcement) ---
 BOUNDARY_MAP = {
     "Food & Drinks": {
@@ -325,6 +640,9 @@ BOUNDARY_MAP = {
     }
 }
 
+# Compiled once: per-category blacklist/whitelist matchers for filtering generated text
+LEAKAGE_MATCHERS = build_matchers(BOUNDARY_MAP)
+
 # --- Dynamic Context Engine ---
 def get_market_context(category):
     """Generates real-time market signals filtered by category relevance."""
@@ -392,8 +710,48 @@ def get_market_context(category):
 
     return "\n    ".join(signals)
 
+# Identical LLM work in flight (same endpoint + normalized parameters) runs once for all waiters
+llm_flight = SingleFlight()
+
+# Total time budget per LLM-backed endpoint (all attempts included). A request can shorten or
+# extend its own wait with the X-Request-Deadline-Ms header, up to LLM_DEADLINE_MAX_MS; the LLM
+# work itself is shared with coalesced callers, so it always runs on the configured budget
+LLM_DEADLINES_MS = {
+    "seasonal": float(os.getenv("LLM_DEADLINE_SEASONAL_MS", "20000")),
+    "validate": float(os.getenv("LLM_DEADLINE_VALIDATE_MS", "5000")),
+    "inventory": float(os.getenv("LLM_DEADLINE_INVENTORY_MS", "15000")),
+}
+LLM_DEADLINE_MAX_MS = float(os.getenv("LLM_DEADLINE_MAX_MS", "60000"))
+
+
+def _llm_deadline_s(endpoint: str, override_ms: float = None) -> float:
+    ms = LLM_DEADLINES_MS[endpoint] if override_ms is None else override_ms
+    return max(0.0, min(ms, LLM_DEADLINE_MAX_MS)) / 1000
+
+
+# Validated outlooks are reused for the day: fresh for SEASONAL_OUTLOOK_FRESH_S (partial lists,
+# e.g. cut short by the deadline, only SEASONAL_PARTIAL_FRESH_S), then served stale while one
+# background refresh asks the LLM again
+SEASONAL_OUTLOOK_FRESH_S = float(os.getenv("SEASONAL_OUTLOOK_FRESH_S", "10800"))
+SEASONAL_PARTIAL_FRESH_S = 300.0
+seasonal_cache = StaleWhileRevalidate(
+    maxsize=256,
+    fresh_ttl=SEASONAL_OUTLOOK_FRESH_S,
+    fresh_for=lambda predictions: SEASONAL_OUTLOOK_FRESH_S if len(predictions) >= 3 else SEASONAL_PARTIAL_FRESH_S,
+)
+# LLM attempts per outlook; SEASONAL_HEDGE_DELAY_MS (unset = sequential retries, 0 = all in parallel)
+# starts another attempt when the in-flight ones are slower than that
+SEASONAL_LLM_ATTEMPTS = 4
+SEASONAL_HEDGE_DELAY_S = float(os.environ["SEASONAL_HEDGE_DELAY_MS"]) / 1000 if os.getenv("SEASONAL_HEDGE_DELAY_MS") else None
+
+
 @app.get("/forecast/seasonal")
-def get_seasonal_outlook(category: str = Query("General"), lat: float = Query(None), lon: float = Query(None)):
+async def get_seasonal_outlook(
+    category: str = Query("General"),
+    lat: float = Query(None),
+    lon: float = Query(None),
+    x_request_deadline_ms: float | None = Header(None),
+):
     """Returns a dynamic, location-aware strategic outlook (location + events)."""
     if not category or category == "General":
         category = "General"
@@ -403,7 +761,29 @@ def get_seasonal_outlook(category: str = Query("General"), lat: float = Query(No
     if category == "Stationery": category = "Stationery & Education"
     if category == "Home": category = "Home Essentials"
     if category == "Healthcare": category = "Healthcare & Wellness"
-    
+
+    now = datetime.now()
+    market_signals = get_market_context(category) # Pass category for filtering
+    key = make_key("seasonal", category, now.strftime("%Y-%m-%d"), market_signals)
+    deadline_s = _llm_deadline_s("seasonal")
+    try:
+        predictions = await seasonal_cache.get(
+            key,
+            lambda: llm_flight.do(key, lambda: _generate_seasonal_outlook(category, market_signals, deadline_s)),
+            expires_at=next_day_rollover(now),
+            timeout=_llm_deadline_s("seasonal", x_request_deadline_ms),
+        )
+    except asyncio.TimeoutError:
+        # Ran out of this request's budget; the outlook keeps generating and is cached for the next caller
+        predictions = None
+    return predictions or _fallback_outlook(category)
+
+
+async def _generate_seasonal_outlook(category: str, market_signals: str, deadline_s: float = None):
+    """
+    Asks the LLM for 3 predictions and keeps the ones that pass the leakage checks; None if none pass.
+    When `deadline_s` runs out, in-flight attempts are cancelled and whatever validated so far is returned.
+    """
     # 1. Get strict rules for category
     sector_rules = BOUNDARY_MAP.get(category, {"whitelist": [], "blacklist": []})
     whitelist = sector_rules["whitelist"]
@@ -413,8 +793,6 @@ def get_seasonal_outlook(category: str = Query("General"), lat: float = Query(No
     forecast_start = (datetime.now() + timedelta(days=3)).strftime("%d %B")
     forecast_end = (datetime.now() + timedelta(days=7)).strftime("%d %B %Y")
     
-    market_signals = get_market_context(category) # Pass category for filtering
-    
     # 2. Hard Constraints Prompt
     prompt = f"""
     [CRITICAL MISSION: ZERO LEAKAGE ARCHITECTURE]
@@ -452,22 +830,24 @@ def get_seasonal_outlook(category: str = Query("General"), lat: float = Query(No
 
 
     valid_predictions = []
+    if not llm.accepting:
+        return None
+    matcher = None if category == "General" else LEAKAGE_MATCHERS.get(category)
 
-    for attempt in range(4): 
+    async def attempt(i: int):
+        """One LLM call; returns its items that pass the leakage checks."""
+        clean = []
         try:
-            chat_completion = client.chat_completion(
-                model="meta-llama/Meta-Llama-3-8B-Instruct",
-                messages=[
+            response = await llm.chat(
+                [
                     {"role": "system", "content": "You are a pragmatic supply chain analyst. No marketing fluff. Output ONLY raw JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=800,
                 temperature=0.1, # Strict Realism
             )
-            response = chat_completion.choices[0].message.content
-            print(f"RAW LLM RESPONSE (Attempt {attempt+1}):\n{response[:200]}...\n")
+            print(f"RAW LLM RESPONSE (Attempt {i+1}):\n{response[:200]}...\n")
             
-            import json, re
             # Clean possible markdown blocks
             text = response.strip()
             if "```json" in text:
@@ -490,48 +870,53 @@ def get_seasonal_outlook(category: str = Query("General"), lat: float = Query(No
                     ).lower()
                     
                     is_item_clean = True
-                    if category != "General":
-                        # 1. Blacklist Check
-                        for black_word in blacklist:
-                            # Use strict word boundary check
-                            pattern = r'\\b' + re.escape(black_word.lower()) + r'\\b'
-                            if re.search(pattern, content_str):
-                                print(f"VETO: Rejected item '{item.get('event')}' due to forbidden term '{black_word}'")
-                                is_item_clean = False
-                                break
-                        
-                        # 2. STRICT WHITELIST ENFORCEMENT (For Flowers & Others)
-                        if is_item_clean and category == "Flowers":
-                            has_whitelist_term = False
-                            for white_word in whitelist:
-                                if white_word.lower() in content_str:
-                                    has_whitelist_term = True
-                                    break
-                            
-                            if not has_whitelist_term:
-                                print(f"VETO: Rejected item '{item.get('event')}' because it lacks Flowers whitelist terms.")
-                                is_item_clean = False
+                    if matcher is not None:
+                        # 1. Blacklist (word boundaries) + 2. STRICT WHITELIST ENFORCEMENT (Flowers), one pass each
+                        verdict = matcher.check(content_str, require_whitelist=category == "Flowers")
+                        if verdict["blacklist_hits"]:
+                            print(f"VETO: Rejected item '{item.get('event')}' due to forbidden terms {verdict['blacklist_hits']}")
+                            is_item_clean = False
+                        elif not verdict["clean"]:
+                            print(f"VETO: Rejected item '{item.get('event')}' because it lacks Flowers whitelist terms.")
+                            is_item_clean = False
                     
                     if is_item_clean:
                         # Ensure type consistency
                         item['type'] = category
-                        # Avoid duplicates
-                        if not any(v['event'] == item['event'] for v in valid_predictions):
-                            valid_predictions.append(item)
-                
-                if len(valid_predictions) >= 3:
-                    print(f"SUCCESS: Collected {len(valid_predictions)} valid predictions.")
-                    return valid_predictions[:3]
+                        clean.append(item)
                 
         except Exception as e:
-            print(f"HF Server Error on attempt {attempt+1}: {e}")
+            print(f"HF Server Error on attempt {i+1}: {e}")
+        return clean
+
+    def merge(items) -> bool:
+        for item in items:
+            # Avoid duplicates
+            if not any(v['event'] == item['event'] for v in valid_predictions):
+                valid_predictions.append(item)
+        return len(valid_predictions) >= 3
+
+    # Attempts run one after another, or hedged: a parallel attempt starts every
+    # SEASONAL_HEDGE_DELAY_MS until 3 clean predictions are in, then the rest are cancelled
+    try:
+        await asyncio.wait_for(
+            hedged(attempt, SEASONAL_LLM_ATTEMPTS, merge, hedge_delay_s=SEASONAL_HEDGE_DELAY_S), deadline_s
+        )
+    except asyncio.TimeoutError:
+        print(f"DEADLINE: {deadline_s:.1f}s budget spent with {len(valid_predictions)} valid predictions.")
+    if len(valid_predictions) >= 3:
+        print(f"SUCCESS: Collected {len(valid_predictions)} valid predictions.")
+        return valid_predictions[:3]
 
     # Return whatever valid predictions we have, even if less than 3
     if valid_predictions:
         print(f"PARTIAL SUCCESS: Returning {len(valid_predictions)} valid predictions.")
         return valid_predictions
+    return None
 
-    # Absolute fallback ONLY if 0 valid predictions found after all attempts
+
+def _fallback_outlook(category: str):
+    # Absolute fallback ONLY if 0 valid predictions found after all attempts (never cached)
     # Dynamic fallback based on category to avoid "hardcoded" feel
     return [
         {
@@ -564,7 +949,7 @@ class ProductValidation(BaseModel):
     category: str
 
 @app.post("/validate-product")
-async def validate_product(data: ProductValidation):
+async def validate_product(data: ProductValidation, x_request_deadline_ms: float | None = Header(None)):
     if data.category == "General":
         return {"valid": True, "reason": "General domain allows all items."}
     
@@ -580,23 +965,35 @@ async def validate_product(data: ProductValidation):
     Output exactly one word: 'VALID' or 'INVALID'.
     """
     
-    try:
-        chat_completion = client.chat_completion(
-            model="meta-llama/Meta-Llama-3-8B-Instruct",
-            messages=[
+    async def classify():
+        response = await llm.chat(
+            [
                 {"role": "system", "content": "You are a strict product classifier. Output only VALID or INVALID."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=5,
             temperature=0.1
         )
-        result = chat_completion.choices[0].message.content.strip().upper()
-        is_valid = "VALID" in result and "INVALID" not in result
+        result = response.strip().upper()
+        return "VALID" in result and "INVALID" not in result
+
+    try:
+        # Identical validations in flight (same product name, case-insensitive, and category) share one call
+        key = make_key("validate-product", data.name.strip().lower(), data.category)
+        deadline_s = _llm_deadline_s("validate")
+        is_valid = await llm_flight.do(
+            key,
+            lambda: asyncio.wait_for(classify(), deadline_s),
+            timeout=_llm_deadline_s("validate", x_request_deadline_ms),
+        )
         
         return {
             "valid": is_valid,
             "reason": f"AI classified {data.name} as {'consistent' if is_valid else 'inconsistent'} with {data.category} domain."
         }
+    except asyncio.TimeoutError:
+        print(f"Validation Error: no verdict within the deadline for {data.name}")
+        return {"valid": True, "reason": "System error, bypass validation."}
     except Exception as e:
         print(f"Validation Error: {e}")
         return {"valid": True, "reason": "System error, bypass validation."}
@@ -621,9 +1018,9 @@ class InventoryItem(BaseModel):
     min_level: int | None = 50
 
 @app.post("/analyze/inventory")
-async def analyze_inventory(items: list[InventoryItem]):
+async def analyze_inventory(items: list[InventoryItem], x_request_deadline_ms: float | None = Header(None)):
     """Uses LLM to perform inventory risk assessment and tactical intervention strategy."""
-    if not HF_TOKEN or not client:
+    if not llm.available:
         return [{"event": "AI Offline", "type": "System", "categories": ["Diagnostics"], "insight": "HuggingFace token missing. Falling back to basic logic."}]
     
     # Format inventory summary for LLM context
@@ -654,18 +1051,15 @@ async def analyze_inventory(items: list[InventoryItem]):
     ]
     """
     
-    try:
-        completion = client.chat_completion(
-            model="meta-llama/Meta-Llama-3-8B-Instruct",
-            messages=[
+    async def audit():
+        response = await llm.chat(
+            [
                 {"role": "system", "content": "You are a professional supply chain analyst for Indian SMEs. Output ONLY raw JSON."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=600,
             temperature=0.4
         )
-        response = completion.choices[0].message.content
-        import json, re
         # Clean markdown
         text = response.strip()
         if "```json" in text: text = text.split("```json")[1].split("```")[0].strip()
@@ -673,23 +1067,32 @@ async def analyze_inventory(items: list[InventoryItem]):
         end = text.rfind("]") + 1
         if start != -1 and end != -1:
             return json.loads(text[start:end])
+        return None
+
+    try:
+        # Requests whose prompt would be identical share one in-flight LLM call
+        deadline_s = _llm_deadline_s("inventory")
+        result = await llm_flight.do(
+            make_key("analyze-inventory", inventory_summary[:15]),
+            lambda: asyncio.wait_for(audit(), deadline_s),
+            timeout=_llm_deadline_s("inventory", x_request_deadline_ms),
+        )
+        if result is not None:
+            return result
+    except asyncio.TimeoutError:
+        print("Inventory Analysis Error: deadline exceeded")
     except Exception as e:
         print(f"Inventory Analysis Error: {e}")
         
     return [{"event": "Heuristic Audit", "type": "Maintenance", "categories": ["General"], "insight": "Stable operations detected. Maintain current safety buffers across all clusters."}]
 
-def _nearest_zone(lat: float, lon: float):
-    """Find nearest MICRO_ZONE to (lat, lon)."""
+def _nearest_zone(lat: float, lon: float, rng=random):
+    """Find nearest micro-zone to (lat, lon)."""
+    zones = zone_registry.current().zones
     if lat is None or lon is None:
-        return random.choice(MICRO_ZONES)
-    best = None
-    best_d = float("inf")
-    for z in MICRO_ZONES:
-        d = calculate_distance(lat, lon, z["center"]["lat"], z["center"]["lon"])
-        if d < best_d:
-            best_d = d
-            best = z
-    return best or MICRO_ZONES[0]
+        return zones.record(rng.randrange(len(zones)))
+    nearest, _ = zones.index.nearest(lat, lon, k=1)
+    return zones.record(int(nearest[0]) if len(nearest) else 0)
 
 
 def _event_multiplier(now, forecast_dates_str):
@@ -709,90 +1112,235 @@ def _event_multiplier(now, forecast_dates_str):
     return mult
 
 
+# Chronos context window and horizon shared by single and batched forecasts
+HISTORY_WINDOW = 30
+FORECAST_HORIZON = 7
+# Max series stacked into one Chronos predict call (keeps peak memory bounded on CPU)
+FORECAST_BATCH_SIZE = int(os.getenv("FORECAST_BATCH_SIZE", "64"))
+# How long the scheduler waits for concurrent requests to join a batch
+FORECAST_BATCH_WINDOW_MS = float(os.getenv("FORECAST_BATCH_WINDOW_MS", "10"))
+# Dedicated inference threads and how many series may wait for them before we shed load
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "256"))
+# auto: route each series to Chronos or the statistical engine; chronos / stat force one engine
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "auto")
+# Forecasts are cached per (model, history window, zone, day, horizon) until midnight
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "4096"))
+forecast_cache = TTLCache(maxsize=FORECAST_CACHE_SIZE)
+
+
+# Always computed: median for predicted_demand, 10th/90th percentiles for the bounds
+DEFAULT_QUANTILES = [0.1, 0.5, 0.9]
+
+
+class ForecastBatchItem(BaseModel):
+    product_id: int
+    lat: float | None = None
+    lon: float | None = None
+    historical_sales: list | None = None
+    quantiles: list[float] | None = None
+
+
+class ForecastBatchBody(BaseModel):
+    items: list[ForecastBatchItem]
+    # Default quantile levels for items that don't set their own
+    quantiles: list[float] | None = None
+    latency_budget_ms: float | None = None
+
+
+@app.get("/metrics/memory")
+def get_memory_metrics():
+    """This worker's RSS split into shared vs private pages, plus the shared weights file size."""
+    return chronos_state.memory()
+
+
+@app.get("/metrics/inference")
+def get_inference_metrics():
+    """Micro-batching stats (batch sizes, queue wait) for tuning FORECAST_BATCH_WINDOW_MS."""
+    return {**forecast_scheduler.stats(), "cache": forecast_cache.stats()}
+
+
+@app.get("/metrics/llm")
+def get_llm_metrics():
+    """LLM client pool usage plus the outlook cache (hits, stale serves, background refreshes)."""
+    return {"client": llm.stats(), "singleflight": llm_flight.stats(), "seasonal_cache": seasonal_cache.stats()}
+
+
+@app.post("/forecast/batch")
+async def post_forecast_batch(body: ForecastBatchBody):
+    """Forecasts many products with stacked Chronos predict calls instead of one call per SKU."""
+    results = await _run_forecast_batch(
+        body.items, default_quantiles=body.quantiles, latency_budget_ms=body.latency_budget_ms
+    )
+    models = sorted({r["model"] for r in results})
+    # "model" keeps the original single-engine response shape; per-series engines are in "models"
+    return {
+        "count": len(results),
+        "model": (models[0] if len(models) == 1 else "mixed") if models else None,
+        "models": models,
+        "results": results,
+    }
+
+
 @app.get("/forecast/{product_id}")
-def get_forecast(product_id: int, lat: float = Query(None), lon: float = Query(None)):
+async def get_forecast(
+    product_id: int,
+    lat: float = Query(None),
+    lon: float = Query(None),
+    quantiles: list[float] = Query(None),
+    latency_budget_ms: float = Query(None),
+):
     """Predicts demand using Chronos-2; uses location and upcoming events/seasons."""
-    return _run_forecast(product_id, lat=lat, lon=lon, historical_sales=None)
+    return await _run_forecast(
+        product_id, lat=lat, lon=lon, historical_sales=None,
+        quantiles=quantiles, latency_budget_ms=latency_budget_ms,
+    )
 
 
 class ForecastBody(BaseModel):
     lat: float | None = None
     lon: float | None = None
     historical_sales: list | None = None
+    # Quantile levels to return per day (default 0.1/0.5/0.9), e.g. [0.05, 0.95] for safety stock
+    quantiles: list[float] | None = None
+    # Above Chronos' expected latency, the statistical engine answers instead
+    latency_budget_ms: float | None = None
 
 
 @app.post("/forecast/{product_id}")
-def post_forecast(product_id: int, body: ForecastBody = None):
+async def post_forecast(product_id: int, body: ForecastBody = None):
     """Forecast with optional past sales and location; factors in events/seasons."""
     body = body or ForecastBody()
-    return _run_forecast(
+    return await _run_forecast(
         product_id,
         lat=body.lat,
         lon=body.lon,
         historical_sales=body.historical_sales,
+        quantiles=body.quantiles,
+        latency_budget_ms=body.latency_budget_ms,
     )
 
 
-def _run_forecast(product_id: int, lat: float = None, lon: float = None, historical_sales: list = None):
-    """Shared logic: past sales + location + events/seasons."""
-    now = datetime.now()
+def _daily_rng(product_id: int, now):
+    """Per-product, per-day RNG so simulated histories (and their forecasts) are reproducible and cacheable."""
+    return random.Random(f"{product_id}:{now.strftime('%Y-%m-%d')}")
+
 
-    # 1. Historical: use past sales if provided, else simulate
+def _prepare_history(historical_sales: list = None, rng=random):
+    """Returns the 30-day context window: past sales if provided, else simulated."""
     if historical_sales and len(historical_sales) >= 14:
-        arr = [float(x) for x in historical_sales[-30:]]
-        if len(arr) < 30:
-            pad = [arr[0] if arr else 50.0] * (30 - len(arr))
+        arr = [float(x) for x in historical_sales[-HISTORY_WINDOW:]]
+        if len(arr) < HISTORY_WINDOW:
+            pad = [arr[0] if arr else 50.0] * (HISTORY_WINDOW - len(arr))
             arr = pad + arr
-        historical_data = torch.tensor([arr], dtype=torch.float32)
+        return arr
+
+    # Stochastic historical generation (Brownian Motion) for "Neural" feel without forced patterns
+    val = 50.0
+    hist = []
+    for _ in range(HISTORY_WINDOW):
+        val = max(10, val + rng.uniform(-10, 10))
+        hist.append(val)
+    return hist
+
+
+def _predict_samples(contexts: list):
+    """Runs one Chronos predict over stacked context windows; returns per-series sample tensors."""
+    return chronos_state.predict(contexts, FORECAST_HORIZON)
+
+
+# Concurrent forecast requests are coalesced into shared predict calls on dedicated workers
+forecast_scheduler = BatchScheduler(
+    _predict_samples,
+    window_ms=FORECAST_BATCH_WINDOW_MS,
+    max_batch_size=FORECAST_BATCH_SIZE,
+    workers=INFERENCE_WORKERS,
+    max_queue=INFERENCE_MAX_QUEUE,
+)
+
+
+def _require_model():
+    """Forecast endpoints answer 503 with a clear warming/failed status until Chronos is loaded."""
+    if chronos_state.ready:
+        return
+    status = chronos_state.status()
+    if status["status"] == "warming":
+        status["message"] = "Forecast model is warming up, please retry shortly."
     else:
-        # Stochastic historical generation (Brownian Motion) for "Neural" feel without forced patterns
-        val = 50.0
-        hist = []
-        for _ in range(30):
-            val = max(10, val + random.uniform(-10, 10))
-            hist.append(val)
-        historical_data = torch.tensor([hist], dtype=torch.float32).unsqueeze(0)
-
-    # 2. Chronos forecast (next 7 days)
-    prediction_length = 7
-    forecast = chronos_pipeline.predict(historical_data, prediction_length)
-    forecast_median = forecast[0].median(dim=0).values.tolist()
-    forecast_lower = forecast[0].quantile(0.1, dim=0).tolist()
-    forecast_upper = forecast[0].quantile(0.9, dim=0).tolist()
-
-    # 3. Location + events: nearest zone and seasonal multiplier
-    zone_context = _nearest_zone(lat, lon)
-    event_mult = _event_multiplier(now, None)
-    market_signals = get_market_context("General")
+        status["message"] = "Forecast model failed to load."
+    raise HTTPException(status_code=503, detail=status, headers={"Retry-After": "5"})
 
-    # Remove Surge Noise and Waves. Return RAW model output.
-    forecast_median = [x * event_mult for x in forecast_median]
-    forecast_lower = [x * 0.7 for x in forecast_median]
-    forecast_upper = [x * 1.3 for x in forecast_median]
 
-    dates = [(now + timedelta(days=i + 1)).strftime("%Y-%m-%d") for i in range(prediction_length)]
+def _submit_inference(contexts: list):
+    """
+    Queues contexts on the inference pool as awaitables; sheds load with 503 when the queue is full,
+    and answers 413 for requests with more uncached Chronos series than the queue can ever hold.
+    """
+    try:
+        futures = forecast_scheduler.submit_many(contexts)
+    except InferenceBatchTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch needs {e.size} Chronos forecasts but at most {e.limit} (INFERENCE_MAX_QUEUE) "
+                   f"can be queued per request; split it into smaller batches.",
+        )
+    except InferenceQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Forecast engine busy, please retry.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return [asyncio.wrap_future(fut) for fut in futures]
+
+
+def _quantile_levels(requested: list = None):
+    """
+    Returns (levels to compute, levels to report): the requested levels (or the defaults)
+    are reported, and the defaults are always computed for the bounds. 422 outside (0, 1).
+    """
+    if any(not 0 < q < 1 for q in requested or []):
+        raise HTTPException(status_code=422, detail="Quantile levels must be between 0 and 1 (exclusive).")
+    reported = sorted(set(requested)) if requested else DEFAULT_QUANTILES
+    return sorted(set(DEFAULT_QUANTILES) | set(reported)), reported
+
+
+def _format_forecast(product_id: int, samples, zone_context: dict, now, event_mult: float, market_signals: str,
+                     levels: list = None, reported: list = None, model: str = None):
+    """Turns one series' forecast samples into the /forecast response payload."""
+    levels = levels or DEFAULT_QUANTILES
+    reported = reported or DEFAULT_QUANTILES
+
+    # All quantile levels in one vectorized pass over the [samples, horizon] array, events applied
+    by_level = dict(zip(levels, (np.quantile(samples, levels, axis=0) * event_mult).tolist()))
+    forecast_median = by_level[0.5]
+    forecast_lower = by_level[0.1]
+    forecast_upper = by_level[0.9]
+
+    dates = [(now + timedelta(days=i + 1)).strftime("%Y-%m-%d") for i in range(FORECAST_HORIZON)]
     formatted_forecast = [
         {
             "date": dates[i],
             "predicted_demand": round(forecast_median[i], 2),
             "lower_bound": round(forecast_lower[i], 2),
             "upper_bound": round(forecast_upper[i], 2),
+            "quantiles": {f"{q:g}": round(by_level[q][i], 2) for q in reported},
         }
-        for i in range(7)
+        for i in range(FORECAST_HORIZON)
     ]
 
-    avg_demand = sum(forecast_median) / 7
+    avg_demand = sum(forecast_median) / FORECAST_HORIZON
     peak_day = max(forecast_median)
     buffer = max(forecast_upper)
+    engine_label = "Chronos-2" if model == chronos_state.model_name else "Statistical"
     ai_insight = (
-        f"Chronos-2 forecast (location: {zone_context['name']}, events applied): "
+        f"{engine_label} forecast (location: {zone_context['name']}, events applied): "
         f"avg {avg_demand:.1f} units/day, peak ~{peak_day:.0f}. "
         f"Buffer {buffer:.0f} units. Upcoming events/seasons factored in."
     )
 
     return {
         "product_id": product_id,
-        "model": CHRONOS_MODEL,
+        "model": model or chronos_state.model_name,
         "forecast": formatted_forecast,
         "ai_insight": ai_insight,
         "context": f"{zone_context['name']} ({zone_context['profile']}) | {market_signals[:80]}...",
@@ -800,9 +1348,129 @@ def _run_forecast(product_id: int, lat: float = None, lon: float = None, histori
         "timestamp": now.isoformat(),
     }
 
+
+def _choose_engine(historical_sales: list, latency_budget_ms: float = None) -> str:
+    """
+    'chronos' or a stat_engine method for this series (FORECAST_ENGINE can pin either engine).
+    In auto mode only series with real history fall back to the statistical engine while Chronos
+    is warming or failed; the simulated path waits for Chronos (503 via _require_model).
+    """
+    if FORECAST_ENGINE == "chronos":
+        return "chronos"
+    if FORECAST_ENGINE == "stat":
+        if not historical_sales:
+            return "seasonal_naive"
+        return stat_engine.choose_engine(historical_sales, chronos_available=False)
+    return stat_engine.choose_engine(
+        historical_sales,
+        chronos_available=chronos_state.ready,
+        latency_budget_ms=latency_budget_ms,
+        expected_chronos_ms=forecast_scheduler.expected_latency_ms(),
+    )
+
+
+def _plan_forecast(product_id: int, lat: float, lon: float, historical_sales: list, now, reported: list,
+                   latency_budget_ms: float = None):
+    """Resolves engine, zone, context window and cache key for one product."""
+    rng = _daily_rng(product_id, now)
+    zone_context = _nearest_zone(lat, lon, rng)
+    engine = _choose_engine(historical_sales, latency_budget_ms)
+    if engine == "chronos":
+        model = chronos_state.model_name
+        context = _prepare_history(historical_sales, rng)
+    else:
+        # The statistical engine uses short histories as-is instead of padding/simulating them
+        model = f"stat/{engine}"
+        if historical_sales:
+            context = [float(x) for x in historical_sales[-HISTORY_WINDOW:]]
+        else:
+            context = _prepare_history(None, rng)
+    key = make_key(
+        model,
+        chronos_state.mode if engine == "chronos" else None,
+        [round(x, 4) for x in context],
+        zone_context["id"],
+        now.strftime("%Y-%m-%d"),
+        FORECAST_HORIZON,
+        reported,
+    )
+    return engine, model, zone_context, context, key
+
+
+def _cached_forecast(key: str, product_id: int, now):
+    cached = forecast_cache.get(key)
+    if cached is None:
+        return None
+    # Identical histories may belong to different products; only the model output is shared
+    return dict(cached, product_id=product_id, timestamp=now.isoformat())
+
+
+async def _forecast_samples(engine: str, contexts: list) -> list:
+    """Chronos contexts go through the inference pool; statistical ones are one vectorized call inline."""
+    if not contexts:
+        return []
+    if engine == "chronos":
+        _require_model()
+        return await asyncio.gather(*_submit_inference(contexts))
+    return stat_engine.forecast_many(engine, contexts, FORECAST_HORIZON)
+
+
+async def _run_forecast(product_id: int, lat: float = None, lon: float = None, historical_sales: list = None,
+                        quantiles: list = None, latency_budget_ms: float = None):
+    """Shared logic: past sales + location + events/seasons."""
+    levels, reported = _quantile_levels(quantiles)
+    now = datetime.now()
+    engine, model, zone_context, context, key = _plan_forecast(
+        product_id, lat, lon, historical_sales, now, reported, latency_budget_ms
+    )
+    cached = _cached_forecast(key, product_id, now)
+    if cached is not None:
+        return cached
+
+    samples = (await _forecast_samples(engine, [context]))[0]
+    result = _format_forecast(
+        product_id, samples, zone_context, now,
+        event_mult=_event_multiplier(now, None),
+        market_signals=get_market_context("General"),
+        levels=levels, reported=reported, model=model,
+    )
+    forecast_cache.set(key, result, expires_at=next_day_rollover(now))
+    return result
+
+
+async def _run_forecast_batch(items: list, default_quantiles: list = None, latency_budget_ms: float = None):
+    """Batched _run_forecast: one Chronos predict per FORECAST_BATCH_SIZE series, one NumPy pass per stat method."""
+    item_levels = [_quantile_levels(item.quantiles or default_quantiles) for item in items]
+    now = datetime.now()
+    event_mult = _event_multiplier(now, None)
+    market_signals = get_market_context("General")
+
+    results = [None] * len(items)
+    pending = {}
+    for i, item in enumerate(items):
+        engine, model, zone_context, context, key = _plan_forecast(
+            item.product_id, item.lat, item.lon, item.historical_sales, now, item_levels[i][1], latency_budget_ms
+        )
+        cached = _cached_forecast(key, item.product_id, now)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(engine, []).append((i, item, model, zone_context, context, key))
+
+    for engine, group in pending.items():
+        samples = await _forecast_samples(engine, [context for _, _, _, _, context, _ in group])
+        for (i, item, model, zone_context, _, key), series_samples in zip(group, samples):
+            results[i] = _format_forecast(
+                item.product_id, series_samples, zone_context, now,
+                event_mult=event_mult, market_signals=market_signals,
+                levels=item_levels[i][0], reported=item_levels[i][1], model=model,
+            )
+            forecast_cache.set(key, results[i], expires_at=next_day_rollover(now))
+    return results
+
 @app.get("/regions")
 def get_regions():
-    return [z["name"] for z in MICRO_ZONES]
+    return list(zone_registry.current().zones.names)
 
 class ForecastInterpretRequest(BaseModel):
     forecast_text: str
@@ -0,0 +1,63 @@
+"""
+Local OpenAI-compatible LLM stand-in for offline load tests.
+Serves POST /v1/chat/completions with llm.canned_reply() after a configurable delay,
+so the real HTTP path (pooling, deadlines, circuit breaker) is exercised without network.
+
+    python mock_llm_server.py --port 8001 --latency-ms 800 --jitter-ms 400 --error-rate 0.05
+    LLM_BACKEND=openai LLM_BASE_URL=http://localhost:8001/v1 uvicorn main:app
+"""
+import argparse
+import time
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from llm import LLMError, MockBackend
+
+
+class ChatRequest(BaseModel):
+    model: str = "mock"
+    messages: list[dict]
+    max_tokens: int = 256
+    temperature: float = 0.1
+
+
+def create_app(latency_ms: float = 200.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+    backend = MockBackend(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate, seed=seed)
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: ChatRequest):
+        try:
+            content = await backend.complete(body.messages, body.max_tokens, body.temperature)
+        except LLMError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return {
+            "id": f"mock-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.seed),
+        host=args.host, port=args.port, log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Background loading of the Chronos pipeline.
+The API starts serving immediately; forecast endpoints report "warming" until the
+model is ready. torch/chronos are imported on the loader thread, not at app import.
+"""
+import threading
+import time
+
+from shared_weights import cache_path, memory_report, share_module_weights
+
+# Tried in order; the first one that loads is served
+CHRONOS_MODELS = ["amazon/chronos-2", "amazon/chronos-t5-tiny"]
+
+# CPU inference modes selectable via CHRONOS_INFERENCE_MODE:
+#   fp32    - reference precision
+#   bf16    - weights and activations in bfloat16
+#   int8    - dynamic int8 quantization of nn.Linear layers
+#   compile - fp32 with torch.compile on the model forward
+INFERENCE_MODES = ["fp32", "bf16", "int8", "compile"]
+
+
+def apply_inference_mode(pipeline, mode: str):
+    """Post-load transforms for `mode` (bf16 is applied at load time via torch_dtype)."""
+    import torch
+
+    # ChronosPipeline.model wraps the HF seq2seq model as .model
+    inner = getattr(pipeline.model, "model", pipeline.model)
+    if mode == "int8":
+        torch.ao.quantization.quantize_dynamic(inner, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    elif mode == "compile":
+        # Compile forward rather than the module so HF generate() still drives decoding
+        inner.forward = torch.compile(inner.forward)
+    return pipeline
+
+
+def load_pipeline(name: str, mode: str = "fp32", share_dir: str = None):
+    """
+    Loads one Chronos pipeline on CPU in the given inference mode.
+    With `share_dir`, weights are rebound to an mmap of a local safetensors cache so
+    every worker process on the box shares one physical copy.
+    """
+    import torch
+    from chronos import ChronosPipeline
+
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode '{mode}', expected one of {INFERENCE_MODES}")
+    pipeline = ChronosPipeline.from_pretrained(
+        name,
+        device_map="cpu",
+        torch_dtype=torch.bfloat16 if mode == "bf16" else torch.float32,
+    )
+    pipeline.shared_weights_path = None
+    if share_dir:
+        if mode == "int8":
+            # Quantization repacks Linear weights into private int8 buffers, nothing left to share
+            print("Shared weights are not supported with int8 inference mode; loading private copy")
+        else:
+            path = cache_path(share_dir, name, mode)
+            pipeline.shared_weights_mmap = share_module_weights(pipeline.model, path)
+            pipeline.shared_weights_path = path
+    return apply_inference_mode(pipeline, mode)
+
+
+def predict_batch(pipeline, contexts: list, prediction_length: int):
+    """One batched predict over equal-length context windows; returns per-series [samples, horizon] arrays."""
+    import torch
+
+    historical_data = torch.tensor(contexts, dtype=torch.float32)
+    with torch.inference_mode():
+        forecast = pipeline.predict(historical_data, prediction_length)
+    forecast = forecast.float().numpy()
+    return [forecast[i] for i in range(len(contexts))]
+
+
+class ModelState:
+    """Holds the loaded pipeline plus its readiness for /readyz and the forecast endpoints."""
+
+    def __init__(self, candidates: list = None, mode: str = "fp32", share_dir: str = None):
+        self.candidates = candidates or CHRONOS_MODELS
+        self.mode = mode
+        self.share_dir = share_dir
+        self.pipeline = None
+        self.model_name = None
+        self.error = None
+        self.started_at = None
+        self.loaded_at = None
+        self._thread = None
+        self._finished = False
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def failed(self) -> bool:
+        return self._finished and not self.ready
+
+    def start(self):
+        """Starts loading on a daemon thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._load, name="chronos-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _load(self):
+        try:
+            self._load_first_available()
+        finally:
+            self._finished = True
+
+    def _load_first_available(self):
+        try:
+            import torch  # noqa: F401
+            import chronos  # noqa: F401
+        except Exception as e:
+            self.error = f"Chronos dependencies unavailable: {e}"
+            print(self.error)
+            return
+        if self.mode not in INFERENCE_MODES:
+            self.error = f"Unknown inference mode '{self.mode}', expected one of {INFERENCE_MODES}"
+            print(self.error)
+            return
+
+        for name in self.candidates:
+            try:
+                self.pipeline = load_pipeline(name, self.mode, share_dir=self.share_dir)
+            except Exception as e:
+                print(f"{name} load failed ({e}), trying next model")
+                self.error = f"{name}: {e}"
+                continue
+            self.model_name = name
+            self.error = None
+            self.loaded_at = time.time()
+            self._ready.set()
+            print(f"Chronos model ready: {name} [{self.mode}] ({self.loaded_at - self.started_at:.1f}s)")
+            if self.share_dir:
+                print(f"Worker memory: {self.memory()}")
+            return
+
+    def memory(self) -> dict:
+        """RSS vs shared-weights size for this worker process."""
+        path = getattr(self.pipeline, "shared_weights_path", None) if self.pipeline else None
+        return memory_report(path)
+
+    def predict(self, contexts: list, prediction_length: int):
+        return predict_batch(self.pipeline, contexts, prediction_length)
+
+    def status(self) -> dict:
+        if self.ready:
+            state = "ready"
+        elif self.failed:
+            state = "failed"
+        else:
+            state = "warming"
+        return {
+            "ready": self.ready,
+            "status": state,
+            "model": self.model_name,
+            "inference_mode": self.mode,
+            "shared_weights": getattr(self.pipeline, "shared_weights_path", None) if self.ready else None,
+            "error": self.error if self.failed else None,
+            "load_seconds": round(self.loaded_at - self.started_at, 2) if self.loaded_at else None,
+        }
@@ -0,0 +1,184 @@
+"""
+Minimal Mapbox Vector Tile (v2) writer for zone polygons.
+Hand-rolled protobuf encoding (varints, packed command streams) plus the Web Mercator
+tile math and Sutherland-Hodgman clipping needed to cut zone circles to a tile.
+"""
+import math
+import struct
+
+EXTENT = 4096
+# Geometry kept past the tile edge so strokes don't seam between neighbouring tiles
+BUFFER = 64
+EARTH_CIRCUMFERENCE_M = 40075016.686
+MIN_RING_VERTICES = 8
+MAX_RING_VERTICES = 64
+# Target spacing between circle vertices, in tile units
+VERTEX_SPACING = 32.0
+
+_POLYGON = 3
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+
+# --- Tile math ---
+def tile_bounds(z: int, x: int, y: int):
+    """(min_lon, min_lat, max_lon, max_lat) of a slippy-map tile."""
+    n = 2 ** z
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def to_tile_coords(lon: float, lat: float, z: int, x: int, y: int, extent: int = EXTENT):
+    """Projects lon/lat into tile-local units (origin top-left, y down)."""
+    n = 2 ** z
+    lat_r = math.radians(max(min(lat, 85.0511), -85.0511))
+    px = (lon + 180.0) / 360.0 * n
+    py = (1.0 - math.asinh(math.tan(lat_r)) / math.pi) / 2.0 * n
+    return (px - x) * extent, (py - y) * extent
+
+
+def meters_to_tile_units(meters: float, lat: float, z: int, extent: int = EXTENT) -> float:
+    return meters / (EARTH_CIRCUMFERENCE_M * math.cos(math.radians(lat)) / (2 ** z * extent))
+
+
+def circle_ring(cx: float, cy: float, r: float):
+    """Polygon approximating a circle; vertex count follows its on-tile size (simplification)."""
+    n = int(min(MAX_RING_VERTICES, max(MIN_RING_VERTICES, math.ceil(2 * math.pi * r / VERTEX_SPACING))))
+    # Increasing angle runs clockwise on screen (y down), the MVT exterior-ring winding
+    return [(cx + r * math.cos(2 * math.pi * i / n), cy + r * math.sin(2 * math.pi * i / n)) for i in range(n)]
+
+
+def clip_ring(ring, lo: float, hi: float):
+    """Sutherland-Hodgman clip of a ring to the square [lo, hi]^2 (exact for convex inputs)."""
+    edges = (
+        (lambda p: p[0] >= lo, 0, lo),
+        (lambda p: p[0] <= hi, 0, hi),
+        (lambda p: p[1] >= lo, 1, lo),
+        (lambda p: p[1] <= hi, 1, hi),
+    )
+    for inside, axis, bound in edges:
+        if not ring:
+            break
+        out = []
+        prev = ring[-1]
+        for cur in ring:
+            if inside(cur):
+                if not inside(prev):
+                    out.append(_intersect(prev, cur, axis, bound))
+                out.append(cur)
+            elif inside(prev):
+                out.append(_intersect(prev, cur, axis, bound))
+            prev = cur
+        ring = out
+    return ring
+
+
+def _intersect(a, b, axis: int, bound: float):
+    t = (bound - a[axis]) / (b[axis] - a[axis])
+    return a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])
+
+
+# --- Protobuf encoding ---
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _len_delimited(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed(number: int, values) -> bytes:
+    return _len_delimited(number, b"".join(_varint(v) for v in values))
+
+
+def _value(v) -> bytes:
+    if isinstance(v, bool):
+        return _field(7, 0) + _varint(int(v))
+    if isinstance(v, int):
+        return _field(6, 0) + _varint(_zigzag(v))  # sint_value
+    if isinstance(v, float):
+        return _field(3, 1) + struct.pack("<d", v)  # double_value
+    return _len_delimited(1, str(v).encode("utf-8"))  # string_value
+
+
+def _polygon_commands(ring):
+    """Command stream for one exterior ring of integer tile coordinates (no repeated closing point)."""
+    x0, y0 = ring[0]
+    cmds = [(1 << 3) | _MOVE_TO, _zigzag(x0), _zigzag(y0), ((len(ring) - 1) << 3) | _LINE_TO]
+    px, py = x0, y0
+    for x, y in ring[1:]:
+        cmds += [_zigzag(x - px), _zigzag(y - py)]
+        px, py = x, y
+    cmds.append((1 << 3) | _CLOSE_PATH)
+    return cmds
+
+
+def _quantize(ring):
+    """Rounds to integer units and drops consecutive duplicates; None if the ring degenerates."""
+    out = []
+    for x, y in ring:
+        p = (int(round(x)), int(round(y)))
+        if not out or out[-1] != p:
+            out.append(p)
+    if len(out) > 1 and out[0] == out[-1]:
+        out.pop()
+    if len(out) < 3:
+        return None
+    # Shoelace sum in tile coordinates: exterior rings must be positive (clockwise on screen)
+    area = sum(out[i - 1][0] * out[i][1] - out[i][0] * out[i - 1][1] for i in range(len(out)))
+    if area == 0:
+        return None
+    return out if area > 0 else out[::-1]
+
+
+def encode_layer(name: str, features, extent: int = EXTENT) -> bytes:
+    """
+    One Layer message. `features` are (id, ring, properties) with the ring in tile units;
+    rings that clip or round away to nothing are skipped.
+    """
+    keys, values = {}, {}
+    body = b""
+    for feature_id, ring, properties in features:
+        ring = _quantize(ring)
+        if ring is None:
+            continue
+        tags = []
+        for k, v in properties.items():
+            tags.append(keys.setdefault(k, len(keys)))
+            tags.append(values.setdefault((type(v).__name__, v), len(values)))
+        feature = (
+            _field(1, 0) + _varint(feature_id)
+            + _packed(2, tags)
+            + _field(3, 0) + _varint(_POLYGON)
+            + _packed(4, _polygon_commands(ring))
+        )
+        body += _len_delimited(2, feature)
+    if not body:
+        return b""
+    layer = (
+        _field(15, 0) + _varint(2)
+        + _len_delimited(1, name.encode("utf-8"))
+        + body
+        + b"".join(_len_delimited(3, k.encode("utf-8")) for k in keys)
+        + b"".join(_len_delimited(4, _value(v)) for _, v in values)
+        + _field(5, 0) + _varint(extent)
+    )
+    return _len_delimited(3, layer)
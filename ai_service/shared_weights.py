@@ -0,0 +1,140 @@
+"""
+Shared, memory-mapped model weights for multi-worker deployments.
+
+The first worker to load a model writes its weights to a local safetensors cache.
+Every worker then rebinds its parameters to read-only tensors over an mmap of that
+file, so N uvicorn workers share one set of physical pages via the page cache
+instead of holding N private copies.
+"""
+import json
+import mmap
+import os
+import struct
+import warnings
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, first-boot writers may race (still correct)
+    fcntl = None
+
+# safetensors dtype tags
+_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def cache_path(cache_dir: str, model_name: str, mode: str) -> str:
+    return os.path.join(cache_dir, f"{model_name.replace('/', '--')}-{mode}.safetensors")
+
+
+@contextmanager
+def _file_lock(path: str):
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_cache(module, path: str):
+    """Writes the module's weights once; tied parameters are stored once and recorded as aliases."""
+    from safetensors.torch import save_file
+
+    unique, aliases, seen = {}, {}, {}
+    for name, tensor in module.state_dict().items():
+        ptr = (tensor.data_ptr(), tensor.dtype, tuple(tensor.shape))
+        if ptr in seen:
+            aliases[name] = seen[ptr]
+            continue
+        seen[ptr] = name
+        unique[name] = tensor.detach().contiguous()
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    save_file(unique, tmp, metadata={"aliases": json.dumps(aliases)})
+    os.replace(tmp, path)
+
+
+def _mmap_state_dict(path: str):
+    """Reads a safetensors file as zero-copy tensors over a read-only shared mmap."""
+    import torch
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header_len = struct.unpack("<Q", mm[:8])[0]
+    header = json.loads(mm[8:8 + header_len])
+    metadata = header.pop("__metadata__", {}) or {}
+    data_start = 8 + header_len
+
+    state = {}
+    with warnings.catch_warnings():
+        # The buffer is intentionally read-only: inference never writes weights
+        warnings.simplefilter("ignore", UserWarning)
+        for name, info in header.items():
+            dtype = getattr(torch, _DTYPES[info["dtype"]])
+            begin, end = info["data_offsets"]
+            count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+            if count == 0:
+                state[name] = torch.empty(info["shape"], dtype=dtype)
+                continue
+            flat = torch.frombuffer(mm, dtype=dtype, count=count, offset=data_start + begin)
+            state[name] = flat.view(info["shape"])
+
+    for alias, canonical in json.loads(metadata.get("aliases", "{}")).items():
+        state[alias] = state[canonical]
+    return state, mm
+
+
+def share_module_weights(module, path: str):
+    """
+    Rebinds `module`'s parameters/buffers to mmap-backed tensors from `path`,
+    creating the cache file first if this is the first worker to get here.
+    Returns the mmap, which must stay referenced for the module's lifetime.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _file_lock(path):
+        if not os.path.exists(path):
+            _write_cache(module, path)
+    state, mm = _mmap_state_dict(path)
+    module.load_state_dict(state, assign=True)
+    return mm
+
+
+def memory_report(shared_path: str = None) -> dict:
+    """Per-worker resident memory split into shared and private pages (Linux /proc), in MB."""
+    report = {"pid": os.getpid()}
+    if shared_path and os.path.exists(shared_path):
+        report["shared_weights_mb"] = round(os.path.getsize(shared_path) / 2**20, 1)
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[-1] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return report
+
+    def kb(*keys):
+        return round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+
+    report.update({
+        "rss_mb": kb("Rss"),
+        "pss_mb": kb("Pss"),
+        "shared_mb": kb("Shared_Clean", "Shared_Dirty"),
+        "private_mb": kb("Private_Clean", "Private_Dirty"),
+    })
+    return report
@@ -0,0 +1,41 @@
+"""
+Single-flight coalescing for async work.
+Concurrent callers asking for the same key share one in-flight computation: the first
+starts it as a task, later ones await the same task, and everyone gets its result (or
+exception). The key is forgotten as soon as the task finishes, so nothing is cached.
+The work itself is bounded by whatever `fn` enforces; every caller, the one that started
+it included, can bound its own wait with `timeout` without cancelling it for anyone else.
+"""
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, timeout: float = None):
+        """
+        Result of `fn()` (a coroutine function), shared with concurrent callers of the same key.
+        A caller waiting longer than `timeout` gets asyncio.TimeoutError while the work carries on.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        # shield: one caller disconnecting (or timing out) must not cancel the work the others are waiting on
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,162 @@
+"""
+Lightweight statistical forecasting engine.
+NumPy-vectorized classical methods (seasonal naive, simple exponential smoothing,
+Croston and TSB for intermittent demand) that forecast thousands of series per second,
+plus the router that decides when a series is worth a Chronos call.
+
+Every method returns a deterministic [samples, horizon] array per series (point forecast
+spread by its in-sample one-step error), so responses are built exactly like Chronos ones.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+SEASON = 7
+# Pseudo-sample grid size; quantiles of the grid reproduce the normal interval
+NUM_SAMPLES = 100
+SES_ALPHAS = (0.1, 0.3, 0.5)
+CROSTON_ALPHA = 0.1
+TSB_ALPHA = 0.1
+TSB_BETA = 0.1
+
+# Router thresholds
+MIN_CHRONOS_HISTORY = 14
+INTERMITTENT_ZERO_SHARE = 0.3
+
+STAT_METHODS = ["seasonal_naive", "ses", "croston", "tsb"]
+
+_Z_GRID = np.array([NormalDist().inv_cdf((i + 0.5) / NUM_SAMPLES) for i in range(NUM_SAMPLES)])
+
+
+def _samples(point, sigma_h):
+    """point, sigma_h: [N, H] -> [N, samples, H] deterministic normal pseudo-samples, floored at 0."""
+    return np.maximum(0.0, point[:, None, :] + sigma_h[:, None, :] * _Z_GRID[None, :, None])
+
+
+def _sigma(errors):
+    """Per-series std of one-step errors ([N, T']); 0 where there are none."""
+    if errors.shape[1] < 2:
+        return np.zeros(errors.shape[0])
+    return np.nanstd(errors, axis=1)
+
+
+def seasonal_naive(Y, horizon: int, season: int = SEASON):
+    """Repeats the last observed season; spread from season-over-season differences."""
+    steps = np.arange(horizon)
+    point = Y[:, -season:][:, steps % season]
+    sigma = _sigma(Y[:, season:] - Y[:, :-season])
+    sigma_h = sigma[:, None] * np.sqrt(steps // season + 1)[None, :]
+    return _samples(point, sigma_h)
+
+
+def ses(Y, horizon: int, alphas=SES_ALPHAS):
+    """Simple exponential smoothing with per-series alpha picked by in-sample SSE."""
+    n, t = Y.shape
+    best_sse = np.full(n, np.inf)
+    level_out = Y[:, -1].copy()
+    sigma_out = np.zeros(n)
+    alpha_out = np.full(n, alphas[0])
+    for alpha in alphas:
+        level = Y[:, 0].copy()
+        errors = np.empty((n, max(t - 1, 0)))
+        for i in range(1, t):
+            errors[:, i - 1] = Y[:, i] - level
+            level += alpha * errors[:, i - 1]
+        sse = (errors ** 2).sum(axis=1)
+        better = sse < best_sse
+        best_sse = np.where(better, sse, best_sse)
+        level_out = np.where(better, level, level_out)
+        sigma_out = np.where(better, _sigma(errors), sigma_out)
+        alpha_out = np.where(better, alpha, alpha_out)
+
+    steps = np.arange(horizon)
+    point = np.repeat(level_out[:, None], horizon, axis=1)
+    sigma_h = sigma_out[:, None] * np.sqrt(1 + steps[None, :] * alpha_out[:, None] ** 2)
+    return _samples(point, sigma_h)
+
+
+def _intermittent_init(Y):
+    nonzero = Y > 0
+    counts = nonzero.sum(axis=1)
+    size = np.where(counts > 0, (Y * nonzero).sum(axis=1) / np.maximum(counts, 1), 0.0)
+    return nonzero, counts, size
+
+
+def croston(Y, horizon: int, alpha: float = CROSTON_ALPHA):
+    """Croston's method: smoothed demand size over smoothed inter-demand interval."""
+    n, t = Y.shape
+    nonzero, counts, size = _intermittent_init(Y)
+    interval = np.where(counts > 0, t / np.maximum(counts, 1), float(t))
+    since = np.zeros(n)
+    errors = np.empty((n, t))
+    for i in range(t):
+        errors[:, i] = Y[:, i] - size / interval
+        since += 1
+        hit = nonzero[:, i]
+        size = np.where(hit, size + alpha * (Y[:, i] - size), size)
+        interval = np.where(hit, interval + alpha * (since - interval), interval)
+        since = np.where(hit, 0, since)
+    point = np.repeat((size / interval)[:, None], horizon, axis=1)
+    sigma_h = np.repeat(_sigma(errors)[:, None], horizon, axis=1)
+    return _samples(point, sigma_h)
+
+
+def tsb(Y, horizon: int, alpha: float = TSB_ALPHA, beta: float = TSB_BETA):
+    """Teunter-Syntetos-Babai: smoothed demand probability times smoothed size (decays for dead items)."""
+    n, t = Y.shape
+    nonzero, counts, size = _intermittent_init(Y)
+    prob = counts / t
+    errors = np.empty((n, t))
+    for i in range(t):
+        errors[:, i] = Y[:, i] - prob * size
+        hit = nonzero[:, i]
+        prob = prob + beta * (hit - prob)
+        size = np.where(hit, size + alpha * (Y[:, i] - size), size)
+    point = np.repeat((prob * size)[:, None], horizon, axis=1)
+    sigma_h = np.repeat(_sigma(errors)[:, None], horizon, axis=1)
+    return _samples(point, sigma_h)
+
+
+_METHODS = {"seasonal_naive": seasonal_naive, "ses": ses, "croston": croston, "tsb": tsb}
+
+
+def forecast_many(method: str, series: list, horizon: int) -> list:
+    """
+    Forecasts a list of 1-D series with one method, vectorized over every group of
+    equal-length series. Returns a [samples, horizon] array per input series, in order.
+    """
+    results = [None] * len(series)
+    by_length = {}
+    for i, s in enumerate(series):
+        by_length.setdefault(len(s), []).append(i)
+    for length, idx in by_length.items():
+        Y = np.asarray([series[i] for i in idx], dtype=np.float64)
+        fn = _METHODS[method]
+        if method == "seasonal_naive" and length < SEASON:
+            fn = ses
+        for i, samples in zip(idx, fn(Y, horizon)):
+            results[i] = samples
+    return results
+
+
+def choose_engine(history: list = None, chronos_available: bool = True,
+                  latency_budget_ms: float = None, expected_chronos_ms: float = 0.0) -> str:
+    """
+    Routes one series: 'chronos' or a STAT_METHODS name.
+      - intermittent history (many zero days)   -> tsb
+      - short history (< MIN_CHRONOS_HISTORY)   -> ses
+      - Chronos unavailable or over the budget  -> seasonal_naive
+    A missing history always stays on the simulated Chronos path: there is nothing real to fit,
+    so callers should report Chronos as unavailable rather than forecast a simulated series.
+    """
+    if not history:
+        return "chronos"
+    values = np.asarray(history, dtype=np.float64)
+    if (values <= 0).mean() >= INTERMITTENT_ZERO_SHARE:
+        return "tsb"
+    if len(values) < MIN_CHRONOS_HISTORY:
+        return "ses"
+    over_budget = latency_budget_ms is not None and expected_chronos_ms > latency_budget_ms
+    if not chronos_available or over_budget:
+        return "seasonal_naive"
+    return "chronos"
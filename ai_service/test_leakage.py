@@ -0,0 +1,28 @@
+"""Checks for the category leakage filter: python -m pytest test_leakage.py"""
+from leakage import CategoryMatcher
+
+CLOTHES = CategoryMatcher(
+    ["clothing", "apparel", "wear", "saree", "festive"],
+    ["food", "sweet", "gadget", "electronic", "appliance"],
+)
+FOOD = CategoryMatcher(
+    ["food", "veg", "sweets", "snack"],
+    ["clothing", "jean", "mobile", "tech", "electronics"],
+)
+
+
+def test_blacklist_catches_plurals():
+    assert not CLOTHES.check("electronics gadgets sale")["clean"]
+    assert CLOTHES.check("sweets for diwali")["blacklist_hits"] == ["sweets"]
+    assert FOOD.check("jeans sale and mobiles")["blacklist_hits"] == ["jeans", "mobiles"]
+    assert not CLOTHES.check("kitchen appliances")["clean"]
+
+
+def test_blacklist_keeps_word_boundaries():
+    assert FOOD.check("a new cooking technique for snacks")["clean"]
+    assert CLOTHES.check("sweetheart necklines")["clean"]
+
+
+def test_whitelist_matches_substrings():
+    assert FOOD.check("fresh vegetables", require_whitelist=True)["clean"]
+    assert not FOOD.check("weekend offers", require_whitelist=True)["clean"]
@@ -0,0 +1,214 @@
+"""
+Array-backed micro-zone data for geo scoring.
+Zone centres, radii, baselines and profile ids live in contiguous NumPy arrays
+(profile names interned to small ints), so heatmap distance and multiplier math
+runs as one vectorized pass instead of a Python loop over zone dicts.
+
+ZoneRegistry loads zones from a GeoJSON (or Parquet) file and swaps in a new
+snapshot atomically whenever the file changes, without restarting workers.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from geo_index import KM_PER_DEG_LON, GridIndex
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from (lat, lon) to arrays of points, in km."""
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lons) - math.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class ZoneArrays:
+    """Struct-of-arrays zone table (one entry per zone, same order in every column) plus its spatial index."""
+
+    def __init__(self, ids, names, lats, lons, radius, profiles, baseline, cell_km: float = 10.0):
+        self.ids = list(ids)
+        self.names = list(names)
+        # Profile names interned: each zone stores a small int into self.profiles
+        self.profiles = sorted(set(profiles))
+        profile_ids = {p: i for i, p in enumerate(self.profiles)}
+        self.profile_idx = np.array([profile_ids[p] for p in profiles], dtype=np.int32)
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.lon = np.asarray(lons, dtype=np.float64)
+        self.radius = np.asarray(radius, dtype=np.float64)
+        self.baseline = np.asarray(baseline, dtype=np.float64)
+        self.index = GridIndex(self.lat, self.lon, cell_km=cell_km)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def record(self, i: int) -> dict:
+        """Zone i as a dict (id, name, center, radius, profile, historical_baseline)."""
+        return {
+            "id": self.ids[i],
+            "name": self.names[i],
+            "center": {"lat": float(self.lat[i]), "lon": float(self.lon[i])},
+            "radius": float(self.radius[i]),
+            "profile": self.profiles[self.profile_idx[i]],
+            "historical_baseline": float(self.baseline[i]),
+        }
+
+    def within(self, lat: float, lon: float, radius_km: float, exact: bool = False):
+        """
+        Zone indices (ascending) and distances within `radius_km`. Default distances use the
+        index's equirectangular scaling; `exact` re-measures candidates with haversine.
+        """
+        if not exact:
+            return self.index.within(lat, lon, radius_km)
+        # The fixed 85 km/deg longitude scale under-measures east-west distance south of ~40N,
+        # so widen the candidate search enough to contain every true haversine hit.
+        km_per_deg_lon = 111.195 * max(math.cos(math.radians(lat)), 1e-6)
+        widen = max(1.0, KM_PER_DEG_LON / km_per_deg_lon) * 1.01
+        idx, _ = self.index.within(lat, lon, radius_km * widen)
+        dist = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        keep = dist <= radius_km
+        return idx[keep], dist[keep]
+
+
+def segment_profile_arrays(profile_data: dict, profiles: list):
+    """
+    Dense per-profile lookup for one segment: multipliers (NaN where the segment has no
+    mapping for that profile) and the matching reasons (None where unmapped).
+    """
+    mults = np.full(len(profiles), np.nan)
+    reasons = [None] * len(profiles)
+    for i, profile in enumerate(profiles):
+        if profile in profile_data:
+            mults[i] = profile_data[profile][0]
+            reasons[i] = profile_data[profile][1]
+    return mults, reasons
+
+
+def category_profile_matrix(category_profiles: dict, profiles: list):
+    """
+    Dense category x profile view of CATEGORY_PROFILES: (categories, multipliers[C, P] with
+    NaN where a category has no mapping for a profile, reasons[C][P] with None there).
+    """
+    categories = list(category_profiles)
+    mults = np.full((len(categories), len(profiles)), np.nan)
+    reasons = []
+    for c, category in enumerate(categories):
+        mults[c], row_reasons = segment_profile_arrays(category_profiles[category], profiles)
+        reasons.append(row_reasons)
+    return categories, mults, reasons
+
+
+ZONE_COLUMNS = ["id", "name", "lat", "lon", "radius", "profile", "historical_baseline"]
+
+
+def _read_geojson(path: str):
+    """Point features with id/name/radius/profile/historical_baseline properties; optional top-level shop_location."""
+    with open(path) as f:
+        data = json.load(f)
+    columns = {c: [] for c in ZONE_COLUMNS}
+    for feature in data.get("features", []):
+        props = feature["properties"]
+        lon, lat = feature["geometry"]["coordinates"][:2]
+        columns["lat"].append(lat)
+        columns["lon"].append(lon)
+        for c in ("id", "name", "radius", "profile", "historical_baseline"):
+            columns[c].append(props[c])
+    return columns, data.get("shop_location")
+
+
+def _read_parquet(path: str):
+    """One row per zone with ZONE_COLUMNS (requires pandas + pyarrow)."""
+    import pandas as pd
+
+    df = pd.read_parquet(path, columns=ZONE_COLUMNS)
+    return {c: df[c].tolist() for c in ZONE_COLUMNS}, None
+
+
+class ZoneSnapshot:
+    """One immutable load of the zone file: arrays, default shop location and a content version."""
+
+    def __init__(self, zones: ZoneArrays, shop_location: dict, version: str, source: str):
+        self.zones = zones
+        self.shop_location = shop_location
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        # Derived per-snapshot lookups (e.g. per-segment profile arrays), rebuilt after each reload
+        self.derived = {}
+
+
+class ZoneRegistry:
+    """
+    Serves the current ZoneSnapshot for a zone file. Every `reload_interval` seconds a
+    caller checks the file's mtime/size; on change the file is parsed off to the side and
+    the snapshot reference is swapped in one assignment, so readers never see a mix.
+    A file that fails to parse is logged and the previous snapshot keeps serving.
+    """
+
+    def __init__(self, path: str, default_shop_location: dict = None, cell_km: float = 10.0,
+                 reload_interval: float = 5.0):
+        self.path = path
+        self.default_shop_location = default_shop_location
+        self.cell_km = cell_km
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._next_check = 0.0
+        self._snapshot = None
+        self.reload()
+
+    def _file_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self, blocking: bool = True) -> bool:
+        """Re-reads the file if it changed; returns True when a new snapshot was installed."""
+        if not self._lock.acquire(blocking=blocking):
+            return False  # another request is already reloading
+        try:
+            try:
+                stamp = self._file_stamp()
+                if stamp == self._stamp:
+                    return False
+                snapshot = self._load()
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                print(f"Zone reload failed ({e}); keeping version {self._snapshot.version}")
+                return False
+            self._stamp = stamp
+            self._snapshot = snapshot
+            print(f"Zones loaded: {len(snapshot.zones)} from {self.path} (version {snapshot.version})")
+            return True
+        finally:
+            self._lock.release()
+
+    def _load(self) -> ZoneSnapshot:
+        with open(self.path, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+        if self.path.endswith(".parquet"):
+            columns, shop_location = _read_parquet(self.path)
+        else:
+            columns, shop_location = _read_geojson(self.path)
+        zones = ZoneArrays(
+            columns["id"], columns["name"], columns["lat"], columns["lon"],
+            columns["radius"], columns["profile"], columns["historical_baseline"],
+            cell_km=self.cell_km,
+        )
+        if not len(zones):
+            raise ValueError("zone file has no zones")
+        return ZoneSnapshot(zones, shop_location or self.default_shop_location, version, self.path)
+
+    def current(self) -> ZoneSnapshot:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            self.reload(blocking=False)
+        return self._snapshot